@@ -0,0 +1,347 @@
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+
+#
+from regi_py import NullLog, GameState, PhaseInfo
+from regi_py import get_strategy_map, simulate_batch
+from regi_py.core import LocationInfo
+from regi_py.strats import RandomStrategy
+from regi_py.strats.phase_utils import get_expansion_at
+from regi_py.strats.mcts_explorer import MCTSExplorerStrategy
+
+
+def get_git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_metadata(d):
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": get_git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "seed": d.seed,
+        "seconds": d.seconds,
+    }
+
+
+def sample_phases(num_phases, num_players, seed):
+    # decision points from random games, like the ones strategies see
+    rng = random.Random(seed)
+    phases = []
+    while len(phases) < num_phases:
+        game = GameState(NullLog(), seed=rng.getrandbits(64))
+        for i in range(num_players):
+            game.add_player(RandomStrategy())
+        game.initialize()
+        while game.decision_pending and len(phases) < num_phases:
+            phases.append(game.export_phaseinfo())
+            combos, _, _ = game.legal_moves()
+            game.apply(rng.randrange(len(combos)))
+    return phases
+
+
+def timed_loop(func, seconds, min_runs=1):
+    # call func until the time budget is spent, returns (runs, elapsed)
+    runs = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while runs < min_runs or elapsed < seconds:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - start
+    return runs, elapsed
+
+
+def bench_strategies(d, strategy_map):
+    results = []
+    for name, klass in strategy_map.items():
+        for num_players in (2, 3, 4):
+            rng = random.Random(d.seed)
+            phases = [0]
+
+            def play_one():
+                game = GameState(NullLog(), seed=rng.getrandbits(64))
+                for i in range(num_players):
+                    game.add_player(klass())
+                game.initialize()
+                game.start_loop()
+                phases[0] += game.phase_count
+
+            games, elapsed = timed_loop(play_one, d.seconds)
+            row = {
+                "strategy": name,
+                "players": num_players,
+                "games": games,
+                "seconds": elapsed,
+                "games_per_second": games / elapsed,
+                "phases_per_second": phases[0] / elapsed,
+            }
+            print(
+                f"{name:>16s} {num_players}p: {row['games_per_second']:10.1f} games/s",
+                file=sys.stderr,
+            )
+            results.append(row)
+    return results
+
+
+def bench_simulate_batch(d):
+    results = []
+    for num_players in (2, 3, 4):
+        starts = sample_phases(32, num_players, d.seed)
+        for strategy in ("random", "damage"):
+            for compact in (True, False):
+                n = 64
+                runs, elapsed = timed_loop(
+                    lambda: simulate_batch(starts, strategy, n, compact=compact),
+                    d.seconds,
+                )
+                games = runs * n * len(starts)
+                row = {
+                    "strategy": strategy,
+                    "players": num_players,
+                    "compact": compact,
+                    "games": games,
+                    "seconds": elapsed,
+                    "games_per_second": games / elapsed,
+                }
+                print(
+                    f"simulate_batch {strategy:>6s} {num_players}p compact={compact}:"
+                    f" {row['games_per_second']:10.1f} games/s",
+                    file=sys.stderr,
+                )
+                results.append(row)
+    return results
+
+
+def bench_phaseinfo(d, phases):
+    results = []
+    codecs = {
+        "string": (lambda p: p.to_string(), PhaseInfo.from_string),
+        "bytes": (lambda p: p.to_bytes(), PhaseInfo.from_bytes),
+    }
+    for fmt, (dump, load) in codecs.items():
+        encoded = [dump(p) for p in phases]
+
+        def round_trip():
+            for e in encoded:
+                dump(load(e))
+
+        runs, elapsed = timed_loop(round_trip, d.seconds)
+        rate = runs * len(encoded) / elapsed
+        print(f"PhaseInfo {fmt} round-trip: {rate:10.1f} /s", file=sys.stderr)
+        results.append(
+            {
+                "format": fmt,
+                "round_trips": runs * len(encoded),
+                "seconds": elapsed,
+                "per_second": rate,
+            }
+        )
+    return results
+
+
+def bench_location(d, phases):
+    def from_active():
+        for p in phases:
+            LocationInfo.from_active(p, p.active_player)
+
+    out = np.zeros((len(phases), 55, 9), dtype=np.float32)
+
+    def batch_from_active():
+        LocationInfo.batch_from_active(phases, out=out)
+
+    results = []
+    for batched, func in ((False, from_active), (True, batch_from_active)):
+        runs, elapsed = timed_loop(func, d.seconds)
+        rate = runs * len(phases) / elapsed
+        print(f"LocationInfo batched={batched}: {rate:10.1f} /s", file=sys.stderr)
+        results.append(
+            {
+                "batched": batched,
+                "calls": runs * len(phases),
+                "seconds": elapsed,
+                "per_second": rate,
+            }
+        )
+    return results
+
+
+def latency_summary(samples):
+    samples = sorted(samples)
+    return {
+        "calls": len(samples),
+        "mean_us": 1e6 * statistics.fmean(samples),
+        "median_us": 1e6 * statistics.median(samples),
+        "p90_us": 1e6 * samples[int(0.9 * (len(samples) - 1))],
+        "max_us": 1e6 * samples[-1],
+    }
+
+
+def bench_expansion(d, phases):
+    results = []
+    for trim in (False, True):
+        random.seed(d.seed)
+        samples = []
+        start = time.perf_counter()
+        while not samples or time.perf_counter() - start < d.seconds:
+            for p in phases:
+                a = time.perf_counter()
+                get_expansion_at(p, trim=trim)
+                samples.append(time.perf_counter() - a)
+        row = {"trim": trim}
+        row.update(latency_summary(samples))
+        print(
+            f"get_expansion_at trim={trim}: {row['median_us']:10.1f} us median",
+            file=sys.stderr,
+        )
+        results.append(row)
+    return results
+
+
+def bench_mcts(d, phases):
+    results = []
+    for backend, iterations in itertools.product(
+        ("native", "python"), d.mcts_iterations
+    ):
+        random.seed(d.seed)
+        strat = MCTSExplorerStrategy(iterations=iterations, backend=backend)
+        it = itertools.cycle(phases)
+        decisions, elapsed = timed_loop(lambda: strat.simulate_node(next(it)), d.seconds)
+        row = {
+            "backend": backend,
+            "iterations": iterations,
+            "decisions": decisions,
+            "seconds": elapsed,
+            "decisions_per_second": decisions / elapsed,
+        }
+        print(
+            f"mcts-{iterations} {backend:>6s}:"
+            f" {row['decisions_per_second']:10.2f} decisions/s",
+            file=sys.stderr,
+        )
+        results.append(row)
+    return results
+
+
+ID_FIELDS = (
+    "strategy",
+    "players",
+    "compact",
+    "trim",
+    "backend",
+    "batched",
+    "iterations",
+    "format",
+)
+
+
+def flatten(results):
+    # {(section, setting, metric): value} for every rate and latency
+    out = dict()
+    for section, rows in results.items():
+        rows = rows if isinstance(rows, list) else [rows]
+        for row in rows:
+            setting = ",".join(f"{k}={row[k]}" for k in ID_FIELDS if k in row)
+            for k, v in row.items():
+                if k.endswith("per_second") or k == "median_us":
+                    out[(section, setting, k)] = v
+    return out
+
+
+def compare(results, baseline_file):
+    with open(baseline_file) as f:
+        old = flatten(json.load(f)["results"])
+    new = flatten(results)
+    for key in sorted(set(old) & set(new)):
+        section, setting, metric = key
+        change = 100 * (new[key] - old[key]) / old[key] if old[key] else float("nan")
+        print(f"{section:>22s} {setting:40s} {metric:22s} {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser("regi-benchmarks")
+    parser.add_argument(
+        "-o", "--output", default="benchmark-results.json", help="output JSON file"
+    )
+    parser.add_argument(
+        "-t",
+        "--seconds",
+        default=1.0,
+        type=float,
+        help="time budget for each measurement",
+    )
+    parser.add_argument("--seed", default=0, type=int, help="seed for sampled games")
+    parser.add_argument(
+        "--num-phases", default=64, type=int, help="number of sampled phases"
+    )
+    parser.add_argument(
+        "--strategies",
+        nargs="*",
+        default=None,
+        help="strategy names to time (default: all of get_strategy_map())",
+    )
+    parser.add_argument(
+        "--mcts-iterations",
+        nargs="*",
+        default=[16, 64, 256],
+        type=int,
+        help="MCTS iteration counts to time",
+    )
+    parser.add_argument(
+        "--skip",
+        nargs="*",
+        default=[],
+        choices=["strategies", "batch", "phaseinfo", "location", "expansion", "mcts"],
+        help="sections to skip",
+    )
+    parser.add_argument(
+        "--compare", default=None, help="earlier results JSON to compare against"
+    )
+    d = parser.parse_args()
+
+    strategy_map = get_strategy_map()
+    if d.strategies is not None:
+        strategy_map = {k: strategy_map[k] for k in d.strategies}
+
+    random.seed(d.seed)
+    phases = sample_phases(d.num_phases, 2, d.seed)
+    results = dict()
+    if "strategies" not in d.skip:
+        results["strategies"] = bench_strategies(d, strategy_map)
+    if "batch" not in d.skip:
+        results["simulate_batch"] = bench_simulate_batch(d)
+    if "phaseinfo" not in d.skip:
+        results["phaseinfo_round_trip"] = bench_phaseinfo(d, phases)
+    if "location" not in d.skip:
+        results["location_from_active"] = bench_location(d, phases)
+    if "expansion" not in d.skip:
+        results["get_expansion_at"] = bench_expansion(d, phases)
+    if "mcts" not in d.skip:
+        results["mcts"] = bench_mcts(d, phases)
+
+    with open(d.output, "w") as f:
+        json.dump({"meta": get_metadata(d), "results": results}, f, indent=4)
+    print(f"saved results to {d.output}", file=sys.stderr)
+
+    if d.compare is not None:
+        compare(results, d.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,10 @@ import msgpack
 import sys
 
 #
-from regi_py import JSONLog, DummyLog, GameState
-from regi_py.strats.mcts_explorer import MCTSSaverStrategy, MCTSNode
+from regi_py import JSONLog, NullLog, GameState
+from regi_py.logging.shards import ShardWriter
+from regi_py.strats import RandomStrategy
+from regi_py.strats.mcts_explorer import MCTSNode
 
 
 def simulate_node(root_node, iterations):
@@ -25,8 +27,8 @@ def simulate_node(root_node, iterations):
 
 def run_single_game(tid, i, num_bots, num_iterations):
     a = time.time()
-    log = DummyLog()
-    strat = MCTSSaverStrategy(iterations=num_iterations)
+    log = NullLog()
+    strat = RandomStrategy()
     game = GameState(log)
     for _ in range(num_bots):
         game.add_player(strat)
@@ -55,6 +57,15 @@ def run_single_game(tid, i, num_bots, num_iterations):
     return history
 
 
+def run_mcts_game_shards(
+    tid, num_games, num_bots, num_iterations, output_folder, shard_size
+):
+    writer = ShardWriter(output_folder, prefix=f"mcts-{tid}", shard_size=shard_size)
+    for i in range(num_games):
+        writer.add_game(run_single_game(tid, i, num_bots, num_iterations))
+    writer.close()
+
+
 def run_mcts_game(tid, num_games, num_bots, num_iterations, output_folder):
     fname = os.path.join(output_folder, f"mcts-{tid}.bin")
     bfile = open(fname, "wb")
@@ -66,16 +77,21 @@ def run_mcts_game(tid, num_games, num_bots, num_iterations, output_folder):
     bfile.close()
 
 
-def submain(num_games, num_bots, num_iterations, num_processes, output_folder):
+def submain(
+    num_games, num_bots, num_iterations, num_processes, output_folder, fmt, shard_size
+):
     mp.set_start_method("fork", force=True)
     processes = []
 
     #
     for j in range(num_processes):
-        proc = mp.Process(
-            target=run_mcts_game,
-            args=(j, num_games, num_bots, num_iterations, output_folder),
-        )
+        if fmt == "npy":
+            target = run_mcts_game_shards
+            args = (j, num_games, num_bots, num_iterations, output_folder, shard_size)
+        else:
+            target = run_mcts_game
+            args = (j, num_games, num_bots, num_iterations, output_folder)
+        proc = mp.Process(target=target, args=args)
         proc.start()
         processes.append(proc)
 
@@ -102,6 +118,15 @@ def main():
         "-o", "--output-folder", type=str, required=True, help="folder to store outputs"
     )
     parser.add_argument("--num-processes", default=2, type=int, help="num processes")
+    parser.add_argument(
+        "--format",
+        default="msgpack",
+        choices=["msgpack", "npy"],
+        help="msgpack records, or memory-mappable .npy shards",
+    )
+    parser.add_argument(
+        "--shard-size", default=4096, type=int, help="rows per .npy shard"
+    )
     d = parser.parse_args()
     if d.num_bots < 2 or d.num_bots > 4:
         raise RuntimeError(f"can only have 2-4 bots per team, not {d.num_bots}")
@@ -113,7 +138,15 @@ def main():
     else:
         os.makedirs(d.output_folder, exist_ok=False)
     #
-    submain(d.num_games, d.num_bots, d.num_iterations, d.num_processes, d.output_folder)
+    submain(
+        d.num_games,
+        d.num_bots,
+        d.num_iterations,
+        d.num_processes,
+        d.output_folder,
+        d.format,
+        d.shard_size,
+    )
 
 
 if __name__ == "__main__":
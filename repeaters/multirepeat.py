@@ -8,7 +8,7 @@ import multiprocessing as mp
 import sys
 
 #
-from regi_py import JSONLog, DummyLog, GameState
+from regi_py import JSONLog, NullLog, GameState
 from regi_py import get_strategy_map
 from regi_py.strats import RandomStrategy
 from regi_py.strats import BruteSamplingStrategy
@@ -27,6 +27,9 @@ STRATEGY_MAP["brute-256"] = lambda: BruteSamplingStrategy(iterations=256)
 STRATEGY_MAP["brute-16"] = lambda: BruteSamplingStrategy(iterations=16)
 STRATEGY_MAP["brute-32"] = lambda: BruteSamplingStrategy(iterations=32)
 STRATEGY_MAP["brute-64"] = lambda: BruteSamplingStrategy(iterations=64)
+STRATEGY_MAP["brute-256-sh"] = lambda: BruteSamplingStrategy(
+    iterations=256, adaptive=True
+)
 
 
 def create_teams(num_teams, num_players):
@@ -67,7 +70,7 @@ def get_mappings(num_games, num_teams, num_players, num_simulations):
 
     start_phases = []
     for i in range(num_games):
-        log = DummyLog()
+        log = NullLog()
         game = GameState(log)
         for j in range(num_players):
             game.add_player(RandomStrategy())
@@ -86,11 +89,18 @@ def save_single_game(output_folder, start_phase, team, i, j, k):
     fname = f"game{i:04d}-team{j:03d}-sim{k:02d}.json"
     log = JSONLog(os.path.join(output_folder, fname))
     game = GameState(log)
-    for bot in team:
-        game.add_player(STRATEGY_MAP[bot]())
+    strats = [STRATEGY_MAP[bot]() for bot in team]
+    for strat in strats:
+        game.add_player(strat)
     game._init_string(start_phase)
     s0 = sum(max(e.hp, 0) for e in game.enemy_pile)
-    game.start_loop()
+    try:
+        game.start_loop()
+    finally:
+        # MCTS strategies may hold a pool of worker processes
+        for strat in strats:
+            if hasattr(strat, "close"):
+                strat.close()
     dt = time.time() - a
     s1 = sum(max(e.hp, 0) for e in game.enemy_pile)
     progress = s0 - s1
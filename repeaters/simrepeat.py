@@ -5,7 +5,7 @@ import random
 import itertools
 
 #
-from regi_py import JSONLog, DummyLog, GameState
+from regi_py import JSONLog, NullLog, GameState
 from regi_py import get_strategy_map
 from regi_py.strats import RandomStrategy
 
@@ -27,7 +27,7 @@ def get_mappings(num_games, num_teams, num_players, num_simulations):
 
     start_phases = []
     for i in range(num_games):
-        log = DummyLog()
+        log = NullLog()
         game = GameState(log)
         for j in range(num_players):
             game.add_player(RandomStrategy())
@@ -1,9 +1,10 @@
 from .core import Suit, Entry, SuitPower, GameStatus, EndGameReason
 from .core import Card, Enemy
 from .core import Player
-from .core import BaseLog, CXXConsoleLog
+from .core import BaseLog, CXXConsoleLog, NullLog, StatsLog
 from .core import GameState
 from .core import PhaseInfo
+from .core import simulate_batch
 from .logging import JSONBaseLog, JSONLog, RegiEncoder, DummyLog
 
 #
@@ -0,0 +1,66 @@
+#include <batch.h>
+#include <dfsel.h>
+#include <statslog.h>
+#include <stdexcept>
+
+namespace regi
+{
+    std::unique_ptr<Strategy> makeNativeStrategy(const std::string &name)
+    {
+        if (name == "random") { return std::make_unique<RandomStrategy>(); }
+        if (name == "damage") { return std::make_unique<DamageStrategy>(); }
+        if (name == "sub-random") { return std::make_unique<SubsetRandomStrategy>(); }
+        if (name == "trim-random") { return std::make_unique<TrimmedRandomStrategy>(); }
+        if (name == "preserve") { return std::make_unique<PreserveStrategy>(); }
+        throw std::invalid_argument("no native strategy named " + name);
+    }
+
+    void simulateBatch(const std::vector<PhaseInfo> &phases, Strategy &strat,
+                       const RolloutPolicy *policy, i32 n, Rng &seeder,
+                       BatchResult &result)
+    {
+        i32 total = static_cast<i32>(phases.size()) * n;
+        result.numPhases = static_cast<i32>(phases.size());
+        result.gamesPerPhase = n;
+        result.endValues.resize(total);
+        result.enemyHPLeft.resize(total);
+        result.phaseCounts.resize(total);
+        result.reasons.resize(total);
+
+        StatsLog log;
+        Rollout start;
+        for (i32 i = 0; i < result.numPhases; ++i)
+        {
+            const PhaseInfo &info = phases[i];
+            if (policy != nullptr && start.load(info))
+            {
+                Rng rng(seeder.next());
+                for (i32 k = 0; k < n; ++k)
+                {
+                    i32 ind = i * n + k;
+                    Rollout r = start;
+                    r.rng.seed(rng.next());
+                    r.play(*policy);
+                    result.endValues[ind] = r.endValue();
+                    result.enemyHPLeft[ind] = r.enemyHPLeft();
+                    result.phaseCounts[ind] = r.phaseCount;
+                    result.reasons[ind] = static_cast<i32>(r.reason);
+                }
+                continue;
+            }
+            GameState g(log, seeder.next());
+            for (i32 p = 0; p < info.numPlayers; ++p) { g.addPlayer(strat); }
+            for (i32 k = 0; k < n; ++k)
+            {
+                i32 ind = i * n + k;
+                g.initPhaseInfo(info);
+                g.setup();
+                if (g.gameRunning()) { g.startLoop(); }
+                result.endValues[ind] = g.endValue();
+                result.enemyHPLeft[ind] = g.enemyHPLeft();
+                result.phaseCounts[ind] = g.phaseCount;
+                result.reasons[ind] = static_cast<i32>(log.reason);
+            }
+        }
+    }
+} /* namespace regi */
@@ -0,0 +1,31 @@
+#ifndef BATCH_H
+#define BATCH_H
+#include <regi.h>
+#include <phaseinfo.h>
+#include <rollout.h>
+#include <memory>
+#include <string>
+#include <vector>
+
+namespace regi
+{
+    /* results of playing out many games from a list of phases,
+     * every array is (numPhases x gamesPerPhase) in row-major order */
+    struct BatchResult
+    {
+        i32 numPhases;
+        i32 gamesPerPhase;
+        std::vector<i32> endValues;   /* 1 if all enemies are dead, -1 otherwise */
+        std::vector<i32> enemyHPLeft; /* sum of positive hp of remaining enemies */
+        std::vector<i32> phaseCounts; /* phases played after the start phase */
+        std::vector<i32> reasons;     /* EndGameReason */
+    };
+
+    std::unique_ptr<Strategy> makeNativeStrategy(const std::string &);
+    /* games are played with a compact Rollout when a policy is
+     * given, falling back to GameState for phases it cannot load */
+    void simulateBatch(const std::vector<PhaseInfo> &, Strategy &, const RolloutPolicy *,
+                       i32, Rng &, BatchResult &);
+} /* namespace regi */
+
+#endif
@@ -58,6 +58,13 @@ namespace regi
         this->powers = pow;
     }
 
+    void Combo::setDetails(i32 dmg, u32 pow)
+    {
+        /* when the caller has already summed the parts */
+        this->baseDmg = dmg;
+        this->powers = pow;
+    }
+
     i32 Combo::getBaseDefense() const
     {
         /* combo does not need to be valid
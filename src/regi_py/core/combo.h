@@ -5,6 +5,32 @@
 
 namespace regi
 {
+    /* no hand holds more than 8 cards. attacks use at most 4,
+     * but a defense can discard the whole hand */
+    constexpr u32 MAX_COMBO_CARDS = 8;
+
+    struct ComboParts
+    {
+        /* cards of a combo, stored inline with a vector-like interface */
+       private:
+        Card cards[MAX_COMBO_CARDS];
+        u32 count;
+
+       public:
+        ComboParts() : count(0) {};
+        u64 size() const { return count; }
+        bool empty() const { return count == 0; }
+        void clear() { count = 0; }
+        void resize(u64 n) { count = n; }
+        void push_back(const Card &c) { cards[count++] = c; }
+        void pop_back() { count--; }
+        Card &operator[](u64 i) { return cards[i]; }
+        const Card &operator[](u64 i) const { return cards[i]; }
+        Card *begin() { return cards; }
+        Card *end() { return cards + count; }
+        const Card *begin() const { return cards; }
+        const Card *end() const { return cards + count; }
+    };
 
     struct Combo
     {
@@ -14,10 +40,11 @@ namespace regi
         u32 bitrep;
 
        public:
-        std::vector<Card> parts;
+        ComboParts parts;
         Combo();
         bool valid(bool);
         void loadDetails();
+        void setDetails(i32, u32);
         u32 getPowers() const;
         i32 getBaseDamage() const;
         i32 getBaseDefense() const;
@@ -1,7 +1,5 @@
 #include <deck.h>
 
-#include <random>
-
 Deck::Deck()
     : cards{
           Card(ACE, SPADES),      //
@@ -74,12 +72,10 @@ void Deck::show() {
     }
 }
 
-void Deck::shuffle() {
+void Deck::shuffle(regi::Rng &rng) {
     i32 i, j;
-    std::random_device dev;
-    std::default_random_engine engine(dev());
     for (i = 0; i < 50; ++i) {
-        j = i + (engine() % (52 - i));
+        j = i + rng.below(52 - i);
         std::swap(cards[i], cards[j]);
     }
 }
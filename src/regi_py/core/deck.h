@@ -1,6 +1,7 @@
 #ifndef DECK_H
 #define DECK_H
 #include <card.h>
+#include <rng.h>
 
 class Deck {
     private:
@@ -9,7 +10,7 @@ class Deck {
 
     public:
         static Deck standard();
-        void shuffle();
+        void shuffle(regi::Rng &);
         void show();
 };
 
@@ -1,6 +1,6 @@
 #include <dfsel.h>
-#include <random>
 #include <algorithm>
+#include <array>
 
 namespace regi
 {
@@ -12,56 +12,152 @@ namespace regi
         return ind;
     }
 
-    void calcAttackMoves(const std::vector<Card> &cards, std::vector<Combo> &combos,
-                         bool yieldAllowed, Combo &cur, i32 i)
+    static void subsetOrder(u32 n, u32 i, u32 cur, std::vector<u8> &order)
     {
-        // cards are assumed ordered
-        if (i >= cards.size()) { return; }
-        u32 tmp = cur.getBitrep();
-        // try adding cards[i] to the combo
-        cur.parts.push_back(Card(cards[i].entry(), cards[i].suit()));
-        cur.setBitrep(tmp | (1 << i));
-        //
-        if (cur.valid(yieldAllowed))
+        // depth-first over the sorted cards, like building a combo card by card
+        cur |= (1u << i);
+        order.push_back(static_cast<u8>(cur));
+        for (u32 j = i + 1; j < n; ++j) { subsetOrder(n, j, cur, order); }
+    }
+
+    const std::vector<u8> &subsetsOfSize(u32 n)
+    {
+        /* nonempty subsets of n cards, in the order a depth-first
+         * search would visit them. computed once for every hand size */
+        static const auto tables = []()
+        {
+            std::array<std::vector<u8>, MAX_COMBO_CARDS + 1> t;
+            for (u32 k = 0; k <= MAX_COMBO_CARDS; ++k)
+            {
+                for (u32 i = 0; i < k; ++i) { subsetOrder(k, i, 0, t[k]); }
+            }
+            return t;
+        }();
+        return tables[n];
+    }
+
+    HandTable::HandTable(const std::vector<Card> &hand) : n(0), jokers(0), aces(0)
+    {
+        // cards are ordered, so that bit i is the i-th smallest card
+        // (hands too large for the table have no combos)
+        if (hand.size() > MAX_COMBO_CARDS) { return; }
+        n = hand.size();
+        for (u32 i = 0; i < n; ++i) { cards[i] = hand[i]; }
+        std::sort(cards, cards + n);
+        loadMasks();
+    }
+
+    HandTable::HandTable(const Card *sorted, u32 count) : n(0), jokers(0), aces(0)
+    {
+        if (count > MAX_COMBO_CARDS) { return; }
+        n = count;
+        for (u32 i = 0; i < n; ++i) { cards[i] = sorted[i]; }
+        loadMasks();
+    }
+
+    void HandTable::loadMasks()
+    {
+        for (u32 i = 0; i < n; ++i)
         {
-            // if combo is valid, accumulate,
-            // and try extending the combo
-            combos.push_back(cur);
-        for (i32 j = i + 1; j < cards.size(); ++j)
+            sameEntry[i] = 0;
+            for (u32 j = 0; j < n; ++j)
             {
-                calcAttackMoves(cards, combos, yieldAllowed, cur, j);
+                if (cards[j].entry() == cards[i].entry()) { sameEntry[i] |= (1u << j); }
             }
+            if (cards[i].entry() == JOKER) { jokers |= (1u << i); }
+            if (cards[i].entry() == ACE) { aces |= (1u << i); }
+            cardStrength[i] = cards[i].strength();
+            cardPower[i] = getPower(cards[i]);
         }
-        //
-        cur.setBitrep(tmp);
-        cur.parts.pop_back();
     }
 
-    i32 Strategy::provideAttack(Combo &result, const Player &player, bool yieldAllowed,
-                                const GameState &g)
+    void HandTable::loadStrengths()
     {
-        (void)g;
-        std::vector<Card> orderedCards;
-        std::vector<Combo> combos;
-        Combo base;
-        if (yieldAllowed && base.parts.size() == 0)
+        /* every mask extends a smaller one by its lowest card */
+        strengths[0] = 0;
+        for (u32 m = 1; m < (1u << n); ++m)
         {
-            combos.push_back(base);
-            yieldAllowed = false;
+            strengths[m] = strengths[m & (m - 1)] + cardStrength[__builtin_ctz(m)];
         }
-        for (i32 i = 0; i < player.cards.size(); ++i)
+    }
+
+    u32 HandTable::attackExtensions(u32 mask) const
+    {
+        /* cards that can be added to a valid attack and keep it valid,
+         * only from above its highest card, as the search adds them */
+        u32 high = 31 - __builtin_clz(mask);
+        u32 above = ((1u << n) - 1) & ~((2u << high) - 1) & ~jokers;
+        if ((mask & jokers) != 0) { return 0; }
+        u32 count = __builtin_popcount(mask);
+        u32 entry = static_cast<u32>(cards[high].entry());
+        if (count == 1)
         {
-            orderedCards.push_back(player.cards[i]);
+            // an ace pairs with anything, or another card of the same entry
+            if ((mask & aces) != 0) { return above; }
+            u32 same = (2 * entry <= 10) ? sameEntry[high] : 0;
+            return above & (aces | same);
         }
-        //
-        std::sort(orderedCards.begin(), orderedCards.end());
-        for (i32 i = 0; i < player.cards.size(); ++i)
+        // an ace and a card cannot be extended, numeric combos stay below 10
+        if ((mask & aces) != 0) { return 0; }
+        if ((count + 1) * entry > 10) { return 0; }
+        return above & sameEntry[high];
+    }
+
+    void HandTable::attacksFrom(u32 mask, u8 *masks, u32 &count) const
+    {
+        masks[count++] = mask;
+        for (u32 m = attackExtensions(mask); m != 0; m &= (m - 1))
         {
-            calcAttackMoves(orderedCards, combos, yieldAllowed, base, i);
+            attacksFrom(mask | (1u << __builtin_ctz(m)), masks, count);
         }
+    }
+
+    u32 HandTable::validAttacks(u8 *masks) const
+    {
+        /* every valid attack in the order of a depth-first search over
+         * the sorted hand. only valid combos are visited, since
+         * an invalid combo cannot become valid by adding cards */
+        u32 count = 0;
+        for (u32 i = 0; i < n; ++i) { attacksFrom(1u << i, masks, count); }
+        return count;
+    }
+
+    void HandTable::fill(Combo &combo, u32 mask) const
+    {
+        i32 dmg = 0;
+        u32 pow = 0;
+        for (u32 m = mask; m != 0; m &= (m - 1))
+        {
+            u32 i = __builtin_ctz(m);
+            combo.parts.push_back(cards[i]);
+            dmg += cardStrength[i];
+            pow |= cardPower[i];
+        }
+        combo.setBitrep(mask);
+        combo.setDetails(dmg, pow);
+    }
+
+    void collectAttacks(const std::vector<Card> &cards, bool yieldAllowed,
+                        std::vector<Combo> &combos)
+    {
+        if (yieldAllowed) { combos.emplace_back(); }
+        HandTable table(cards);
+        u8 masks[1u << MAX_COMBO_CARDS];
+        u32 count = table.validAttacks(masks);
+        for (u32 i = 0; i < count; ++i)
+        {
+            combos.emplace_back();
+            table.fill(combos.back(), masks[i]);
+        }
+    }
+
+    i32 Strategy::provideAttack(Combo &result, const Player &player, bool yieldAllowed,
+                                const GameState &g)
+    {
+        std::vector<Combo> combos;
+        collectAttacks(player.cards, yieldAllowed, combos);
         if (combos.size() == 0) { return -1; }
         if (g.enemyPile.empty()) { return -1; }
-        for (auto &cc : combos) { cc.loadDetails(); }
 
         i32 ind = getAttackIndex(combos, player, yieldAllowed, g);
         if (ind < 0 || ind >= combos.size()) { return -1; }
@@ -72,49 +168,25 @@ namespace regi
         }
     }
 
-    void calcDefenseMoves(const std::vector<Card> &cards, std::vector<Combo> &combos,
-                          i32 damage, Combo &cur, i32 i)
+    void collectDefenses(const std::vector<Card> &cards, i32 damage,
+                         std::vector<Combo> &combos)
     {
-        // cards are assumed ordered
-        if (i >= cards.size()) { return; }
-        // try adding cards[i] to the combo
-        u32 tmp = cur.getBitrep();
-        cur.parts.push_back(Card(cards[i].entry(), cards[i].suit()));
-        cur.setBitrep(tmp | (1 << i));
-        //
-        if (cur.getBaseDefense() >= damage)
-        {
-            // if combo can defend, accumulate
-            combos.push_back(cur);
-        }
-        // try extending the combo
-        for (i32 j = i + 1; j < cards.size(); ++j)
+        HandTable table(cards);
+        table.loadStrengths();
+        for (u32 mask : subsetsOfSize(table.n))
         {
-            calcDefenseMoves(cards, combos, damage, cur, j);
+            if (table.strengths[mask] < damage) { continue; }
+            combos.emplace_back();
+            table.fill(combos.back(), mask);
         }
-        //
-        cur.setBitrep(tmp);
-        cur.parts.pop_back();
     }
 
     i32 Strategy::provideDefense(Combo &result, const Player &player, i32 damage,
                                  const GameState &g)
     {
-        (void)g;
         // we only enter this if it is actually possible to block
         std::vector<Combo> combos;
-        std::vector<Card> orderedCards;
-        Combo base;
-        for (i32 i = 0; i < player.cards.size(); ++i)
-        {
-            orderedCards.push_back(player.cards[i]);
-        }
-        //
-        std::sort(orderedCards.begin(), orderedCards.end());
-        for (i32 i = 0; i < player.cards.size(); ++i)
-        {
-            calcDefenseMoves(orderedCards, combos, damage, base, i);
-        }
+        collectDefenses(player.cards, damage, combos);
         if (combos.size() == 0) { return -1; }
 
         i32 ind = getDefenseIndex(combos, player, damage, g);
@@ -126,13 +198,123 @@ namespace regi
         }
     }
 
-    i32 selectRandomCombo(const std::vector<Combo> &combos)
+    i32 selectRandomCombo(const std::vector<Combo> &combos, Rng &rng)
     {
         i32 len = combos.size();
         if (len == 0) return -1;
-        std::random_device dev;
-        std::default_random_engine engine(dev());
-        return engine() % len;
+        return rng.below(len);
+    }
+
+    u32 nonbadAttacks(const u32 *sizes, u32 count, Rng &rng, u32 *kept)
+    {
+        /* with enough moves around, a yield is kept 40% of the time */
+        u32 k = 0;
+        for (u32 i = 0; i < count; ++i)
+        {
+            if (count < 4 || sizes[i] != 0 || rng.uniform() > 0.6) { kept[k++] = i; }
+        }
+        return k;
+    }
+
+    u32 nonbadDefenses(const u32 *sizes, const i32 *blocks, u32 count, Rng &rng,
+                       u32 *kept)
+    {
+        /* a defense is dropped with probability 0.5 for every defense
+         * with fewer cards that blocks no more than it, at most 0.99.
+         * the smallest defenses are always kept */
+        u32 k = 0;
+        for (u32 i = 0; i < count; ++i)
+        {
+            u32 lower = 0;
+            for (u32 j = 0; j < count && lower < 2 && count >= 4; ++j)
+            {
+                if (sizes[j] < sizes[i] && blocks[j] <= blocks[i]) { lower += 1; }
+            }
+            double p = (lower >= 2) ? 0.99 : 0.5 * lower;
+            if (lower == 0 || rng.uniform() > p) { kept[k++] = i; }
+        }
+        return k;
+    }
+
+    bool attackYieldFails(const std::vector<Combo> &combos, const GameState &g)
+    {
+        /* like the python version, it fails 70% of the time
+         * whatever the move, unless the current enemy is fully blocked */
+        if (combos.size() < 4 || g.enemyHPLeft() == 0) { return false; }
+        const Enemy &enemy = g.enemyPile.front();
+        if (g.calcBlock(enemy) >= enemy.strength()) { return false; }
+        return g.rng.uniform() <= 0.7;
+    }
+
+    bool defendThrowing(u32 ind, const std::vector<Combo> &combos, Rng &rng)
+    {
+        if (combos.size() < 4) { return false; }
+        u32 size = combos[ind].parts.size();
+        i32 block = combos[ind].getBaseDefense();
+        u32 lower = 0;
+        for (const Combo &c : combos)
+        {
+            if (c.parts.size() < size && c.getBaseDefense() <= block) { lower += 1; }
+        }
+        if (lower == 0) { return false; }
+        double p = (lower >= 2) ? 0.99 : 0.5;
+        return rng.uniform() <= p;
+    }
+
+    u32 preserveAttacks(const std::vector<Combo> &combos, const Player &player,
+                        const GameState &g, u32 *kept)
+    {
+        /* attacks that leave enough in hand to block the current enemy,
+         * or all of them if there are none */
+        u32 count = combos.size();
+        u32 k = 0;
+        if (count >= 3)
+        {
+            const Enemy &enemy = g.enemyPile.front();
+            i32 need = enemy.strength() - g.calcBlock(enemy);
+            i32 total = 0;
+            for (const Card &c : player.cards) { total += c.strength(); }
+            for (u32 i = 0; i < count; ++i)
+            {
+                i32 remain = total;
+                for (const Card &c : combos[i].parts) { remain -= c.strength(); }
+                if (remain >= need - g.calcBlockOfCombo(enemy, combos[i]))
+                {
+                    kept[k++] = i;
+                }
+            }
+        }
+        if (k == 0)
+        {
+            for (u32 i = 0; i < count; ++i) { kept[i] = i; }
+            k = count;
+        }
+        return k;
+    }
+
+    static i32 pickNonbadAttack(const std::vector<Combo> &combos, Rng &rng)
+    {
+        u32 count = combos.size();
+        u32 sizes[(1u << MAX_COMBO_CARDS) + 1];
+        u32 kept[(1u << MAX_COMBO_CARDS) + 1];
+        for (u32 i = 0; i < count; ++i) { sizes[i] = combos[i].parts.size(); }
+        u32 k = nonbadAttacks(sizes, count, rng, kept);
+        return static_cast<i32>(kept[rng.below(k)]);
+    }
+
+    static i32 pickNonbadDefense(const std::vector<Combo> &combos, Rng &rng)
+    {
+        u32 count = combos.size();
+        u32 sizes[(1u << MAX_COMBO_CARDS) + 1];
+        i32 blocks[(1u << MAX_COMBO_CARDS) + 1];
+        u32 kept[(1u << MAX_COMBO_CARDS) + 1];
+        for (u32 i = 0; i < count; ++i)
+        {
+            sizes[i] = combos[i].parts.size();
+            blocks[i] = combos[i].getBaseDefense();
+        }
+        u32 k = nonbadDefenses(sizes, blocks, count, rng, kept);
+        return static_cast<i32>(kept[rng.below(k)]);
     }
 
     i32 calcDamage(const Combo &cur, const Enemy &enemy, const GameState &g)
@@ -162,8 +344,7 @@ namespace regi
     {
         (void)player;
         (void)yieldAllowed;
-        (void)g;
-        return selectRandomCombo(combos);
+        return selectRandomCombo(combos, g.rng);
     }
 
     i32 RandomStrategy::getDefenseIndex(const std::vector<Combo> &combos,
@@ -172,8 +353,7 @@ namespace regi
     {
         (void)player;
         (void)damage;
-        (void)g;
-        return selectRandomCombo(combos);
+        return selectRandomCombo(combos, g.rng);
     }
 
     i32 RandomStrategy::getRedirectIndex(const Player &player, const GameState &g)
@@ -182,9 +362,7 @@ namespace regi
         if (N < 2 || player.id != g.activePlayerID) {
             return -1;
         }
-        std::random_device dev;
-        std::default_random_engine engine(dev());
-        i32 offset = 1 + (engine() % (N - 1));
+        i32 offset = 1 + g.rng.below(N - 1);
         i32 nextPlayerID = (g.activePlayerID + offset) % N;
         return nextPlayerID;
     }
@@ -268,11 +446,72 @@ namespace regi
         if (N < 2 || player.id != g.activePlayerID) {
             return -1;
         }
-        std::random_device dev;
-        std::default_random_engine engine(dev());
-        i32 offset = 1 + (engine() % (N - 1));
+        i32 offset = 1 + g.rng.below(N - 1);
         i32 nextPlayerID = (g.activePlayerID + offset) % N;
         return nextPlayerID;
     }
 
+    i32 SubsetRandomStrategy::getAttackIndex(const std::vector<Combo> &combos,
+                                             const Player &player, bool yieldAllowed,
+                                             const GameState &g)
+    {
+        (void)player;
+        (void)yieldAllowed;
+        if (combos.empty()) { return -1; }
+        return pickNonbadAttack(combos, g.rng);
+    }
+
+    i32 SubsetRandomStrategy::getDefenseIndex(const std::vector<Combo> &combos,
+                                              const Player &player, i32 damage,
+                                              const GameState &g)
+    {
+        (void)player;
+        (void)damage;
+        if (combos.empty()) { return -1; }
+        return pickNonbadDefense(combos, g.rng);
+    }
+
+    i32 TrimmedRandomStrategy::getAttackIndex(const std::vector<Combo> &combos,
+                                              const Player &player, bool yieldAllowed,
+                                              const GameState &g)
+    {
+        (void)player;
+        (void)yieldAllowed;
+        i32 ind = selectRandomCombo(combos, g.rng);
+        if (ind < 0 || attackYieldFails(combos, g)) { return -1; }
+        return ind;
+    }
+
+    i32 TrimmedRandomStrategy::getDefenseIndex(const std::vector<Combo> &combos,
+                                               const Player &player, i32 damage,
+                                               const GameState &g)
+    {
+        (void)player;
+        (void)damage;
+        i32 ind = selectRandomCombo(combos, g.rng);
+        if (ind < 0 || defendThrowing(ind, combos, g.rng)) { return -1; }
+        return ind;
+    }
+
+    i32 PreserveStrategy::getAttackIndex(const std::vector<Combo> &combos,
+                                         const Player &player, bool yieldAllowed,
+                                         const GameState &g)
+    {
+        (void)yieldAllowed;
+        if (combos.empty()) { return -1; }
+        u32 kept[(1u << MAX_COMBO_CARDS) + 1];
+        u32 k = preserveAttacks(combos, player, g, kept);
+        return static_cast<i32>(kept[g.rng.below(k)]);
+    }
+
+    i32 PreserveStrategy::getDefenseIndex(const std::vector<Combo> &combos,
+                                          const Player &player, i32 damage,
+                                          const GameState &g)
+    {
+        (void)player;
+        (void)damage;
+        if (combos.empty()) { return -1; }
+        return pickNonbadDefense(combos, g.rng);
+    }
+
 } /* namespace regi */
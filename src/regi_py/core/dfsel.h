@@ -34,12 +34,72 @@ namespace regi
         i32 getRedirectIndex(const Player &, const GameState &);
     };
 
-    i32 selectRandomCombo(const std::vector<Combo> &);
+    /* SubsetRandomStrategy, TrimmedRandomStrategy and PreserveStrategy of
+     * strats/, with setup and redirects as RandomStrategy */
+    struct SubsetRandomStrategy : public RandomStrategy
+    {
+       public:
+        i32 getAttackIndex(const std::vector<Combo> &, const Player &, bool,
+                           const GameState &);
+        i32 getDefenseIndex(const std::vector<Combo> &, const Player &, i32,
+                            const GameState &);
+    };
+
+    struct TrimmedRandomStrategy : public RandomStrategy
+    {
+       public:
+        i32 getAttackIndex(const std::vector<Combo> &, const Player &, bool,
+                           const GameState &);
+        i32 getDefenseIndex(const std::vector<Combo> &, const Player &, i32,
+                            const GameState &);
+    };
+
+    struct PreserveStrategy : public RandomStrategy
+    {
+       public:
+        i32 getAttackIndex(const std::vector<Combo> &, const Player &, bool,
+                           const GameState &);
+        i32 getDefenseIndex(const std::vector<Combo> &, const Player &, i32,
+                            const GameState &);
+    };
+
+    struct HandTable
+    {
+        /* combos are subsets of a byte of the (sorted) hand */
+        u32 n;
+        Card cards[MAX_COMBO_CARDS];
+        u32 sameEntry[MAX_COMBO_CARDS];
+        u32 jokers;
+        u32 aces;
+        i32 cardStrength[MAX_COMBO_CARDS];
+        u32 cardPower[MAX_COMBO_CARDS];
+        i32 strengths[1u << MAX_COMBO_CARDS];
+        explicit HandTable(const std::vector<Card> &);
+        HandTable(const Card *, u32); /* cards already sorted */
+        void loadMasks();
+        void loadStrengths();
+        u32 attackExtensions(u32) const;
+        void attacksFrom(u32, u8 *, u32 &) const;
+        u32 validAttacks(u8 *) const;
+        void fill(Combo &, u32) const;
+    };
+
+    const std::vector<u8> &subsetsOfSize(u32);
+    i32 selectRandomCombo(const std::vector<Combo> &, Rng &);
+    /* the move filters of SubsetRandomStrategy (strats/phase_utils.py).
+     * sizes are the number of cards in each move, so a yield has size 0.
+     * the indices of the moves that are kept go to the last argument */
+    u32 nonbadAttacks(const u32 *, u32, Rng &, u32 *);
+    u32 nonbadDefenses(const u32 *, const i32 *, u32, Rng &, u32 *);
+    /* attack_yieldfail, defend_throwing and get_preserve_attacks of
+     * strats/phase_utils.py, with the same probabilities */
+    bool attackYieldFails(const std::vector<Combo> &, const GameState &);
+    bool defendThrowing(u32, const std::vector<Combo> &, Rng &);
+    u32 preserveAttacks(const std::vector<Combo> &, const Player &, const GameState &,
+                        u32 *);
+    void collectAttacks(const std::vector<Card> &, bool, std::vector<Combo> &);
+    void collectDefenses(const std::vector<Card> &, i32, std::vector<Combo> &);
     i32 calcDamage(const Combo &, const Enemy &, const GameState &);
-    void calcAttackMoves(const std::vector<Card> &, std::vector<Combo> &, bool, Combo &,
-                         i32);
-    void calcDefenseMoves(const std::vector<Card> &, std::vector<Combo> &, i32, Combo &,
-                          i32);
 } /* namespace regi */
 
 #endif
@@ -24,6 +24,8 @@ namespace regi
         {
             player.cards.push_back(drawPile.front());
             log.drawOne(player);
+            hash.hands += PhaseHash::handKey(drawPile.front(), player.id);
+            hash.draw.popFront(PhaseHash::drawKey(drawPile.front()));
             drawPile.erase(drawPile.begin());
             return 1;
         }
@@ -37,10 +39,17 @@ namespace regi
 
     void GameState::refreshDiscards(i32 n)
     {
-        shuffle(discardPile, 0, discardPile.size());
+        shuffle(discardPile, 0, discardPile.size(), rng);
+        hash.discard.clear();
+        for (const Card &c : discardPile)
+        {
+            hash.discard.pushBack(PhaseHash::discardKey(c));
+        }
         i32 count = 0;
         for (; n > 0 && discardPile.size() != 0; n--)
         {
+            hash.draw.pushBack(PhaseHash::drawKey(discardPile.back()));
+            hash.discard.popBack(PhaseHash::discardKey(discardPile.back()));
             drawPile.push_back(discardPile.back());
             discardPile.pop_back();
             count += 1;
@@ -72,7 +81,7 @@ namespace regi
     }
 
     /* defense */
-    i32 GameState::calcBlockOfCombo(Enemy &enemy, Combo &curcombo)
+    i32 GameState::calcBlockOfCombo(const Enemy &enemy, const Combo &curcombo) const
     {
         u32 epow = getPower(enemy) & SPADES_BLOCK;
         for (auto &combo : usedPile)
@@ -93,7 +102,7 @@ namespace regi
         return blk;
     }
 
-    i32 GameState::calcBlock(Enemy &enemy)
+    i32 GameState::calcBlock(const Enemy &enemy) const
     {
         u32 epow = getPower(enemy) & SPADES_BLOCK;
         for (auto &combo : usedPile)
@@ -142,7 +151,7 @@ namespace regi
 
     /* attack */
 
-    i32 GameState::calcDamageOfCombo(Enemy &enemy, Combo &curcombo)
+    i32 GameState::calcDamageOfCombo(const Enemy &enemy, const Combo &curcombo) const
     {
         u32 epow = getPower(enemy) & CLUBS_DOUBLE;
         for (auto &combo : usedPile)
@@ -194,21 +203,29 @@ namespace regi
         if (enemy.hp > 0) return 0;
         Card econ(enemy.entry(), enemy.suit());
         log.enemyKill(enemy, *this);
+        hash.enemies.popFront(PhaseHash::enemyKey(enemy));
         if (enemy.hp == 0)
         {
             /* exact kill, so add to top of draw pile */
+            hash.draw.pushFront(PhaseHash::drawKey(econ));
             drawPile.insert(drawPile.begin(), econ);
             enemyPile.erase(enemyPile.begin());
         }
         else
         {
+            hash.discard.pushBack(PhaseHash::discardKey(econ));
             discardPile.push_back(econ);
             enemyPile.erase(enemyPile.begin());
         }
         for (auto &comb : usedPile)
         {
-            for (auto &c : comb.parts) { discardPile.push_back(c); }
+            for (auto &c : comb.parts)
+            {
+                hash.discard.pushBack(PhaseHash::discardKey(c));
+                discardPile.push_back(c);
+            }
         }
+        hash.used.clear();
         usedPile.clear();
         return 1;
     }
@@ -219,7 +236,9 @@ namespace regi
         selectAttack(player, pastYieldsInARow < (totalPlayers() - 1));
         if (!gameRunning()) return;
         i32 damage = calcDamage(enemy);
+        std::uint64_t before = PhaseHash::enemyKey(enemy);
         enemy.hp -= damage;
+        hash.enemies.replaceFront(before, PhaseHash::enemyKey(enemy));
         log.attack(player, enemy, usedPile.back(), damage, *this);
         applyAttackEffects(player, enemy);
     }
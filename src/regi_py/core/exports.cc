@@ -1,11 +1,16 @@
 #include <regi.h>
 #include <console.h>
+#include <statslog.h>
 #include <dfsel.h>
 #include <phaseinfo.h>
 #include <location.h>
+#include <batch.h>
+#include <mcts.h>
+#include <cmath>
 //
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <pybind11/numpy.h>
 #include <pybind11/stl_bind.h>
 #include <pybind11/native_enum.h>
 namespace py = pybind11;
@@ -138,8 +143,7 @@ void bind_cards(pybind11::object &m)
         .def(
             "__gt__", [](const Card &c1, const Card &c2) { return c1 > c2; },
             py::is_operator())
-        .def("__hash__",
-             [](const Card &c) { return std::hash<std::string>{}(stringify<Card>(c)); })
+        .def("__hash__", &Card::toIndex)
         .def("__repr__", &stringify<Card>)
         .def("__str__", &stringify<Card>);
 
@@ -154,7 +158,9 @@ void bind_cards(pybind11::object &m)
         .def("__str__", &stringify<Enemy>);
 
     py::class_<Combo>(m, "Combo")
-        .def_readonly("parts", &Combo::parts)
+        .def_property_readonly("parts",
+                               [](const Combo &c)
+                               { return std::vector<Card>(c.parts.begin(), c.parts.end()); })
         .def_property_readonly("can_attack",
                                [](Combo &c) { return c.valid(true) != 0; })
         .def_property_readonly("base_damage", &Combo::getBaseDamage)
@@ -201,6 +207,42 @@ class PyDamageStrategy : public DamageStrategy, py::trampoline_self_life_support
     using DamageStrategy::DamageStrategy;
 };
 
+class PySubsetRandomStrategy : public SubsetRandomStrategy,
+                               py::trampoline_self_life_support
+{
+    using SubsetRandomStrategy::SubsetRandomStrategy;
+};
+
+class PyTrimmedRandomStrategy : public TrimmedRandomStrategy,
+                                py::trampoline_self_life_support
+{
+    using TrimmedRandomStrategy::TrimmedRandomStrategy;
+};
+
+class PyPreserveStrategy : public PreserveStrategy, py::trampoline_self_life_support
+{
+    using PreserveStrategy::PreserveStrategy;
+};
+
+template <typename T, typename PyT>
+static void bind_native_strat(pybind11::object &m, const char *klassname,
+                              const char *stratname,
+                              py::class_<Strategy, PyBaseStrategy, py::smart_holder> &base)
+{
+    py::class_<T, PyT, py::smart_holder>(m, klassname, base)
+        .def(py::init<>())
+        .def_property_readonly_static("__strat_name__",
+                                      [stratname](py::object self)
+                                      {
+                                          (void)self;
+                                          return stratname;
+                                      })
+        .def("setup", &T::setup)
+        .def("getAttackIndex", &T::getAttackIndex)
+        .def("getRedirectIndex", &T::getRedirectIndex)
+        .def("getDefenseIndex", &T::getDefenseIndex);
+}
+
 void bind_strat(pybind11::object &m)
 {
     py::class_<Strategy, PyBaseStrategy, py::smart_holder> base(m, "BaseStrategy");
@@ -209,32 +251,16 @@ void bind_strat(pybind11::object &m)
         .def("getAttackIndex", &Strategy::getAttackIndex)
         .def("getRedirectIndex", &Strategy::getRedirectIndex)
         .def("getDefenseIndex", &Strategy::getDefenseIndex);
-    py::class_<RandomStrategy, PyRandomStrategy, py::smart_holder>(m, "RandomStrategy",
-                                                                   base)
-        .def(py::init<>())
-        .def_property_readonly_static("__strat_name__",
-                                      [](py::object self)
-                                      {
-                                          (void)self;
-                                          return "random";
-                                      })
-        .def("setup", &RandomStrategy::setup)
-        .def("getAttackIndex", &RandomStrategy::getAttackIndex)
-        .def("getRedirectIndex", &RandomStrategy::getRedirectIndex)
-        .def("getDefenseIndex", &RandomStrategy::getDefenseIndex);
-    py::class_<DamageStrategy, PyDamageStrategy, py::smart_holder>(m, "DamageStrategy",
-                                                                   base)
-        .def(py::init<>())
-        .def_property_readonly_static("__strat_name__",
-                                      [](py::object self)
-                                      {
-                                          (void)self;
-                                          return "damage";
-                                      })
-        .def("setup", &DamageStrategy::setup)
-        .def("getAttackIndex", &DamageStrategy::getAttackIndex)
-        .def("getRedirectIndex", &DamageStrategy::getRedirectIndex)
-        .def("getDefenseIndex", &DamageStrategy::getDefenseIndex);
+    bind_native_strat<RandomStrategy, PyRandomStrategy>(m, "RandomStrategy", "random",
+                                                        base);
+    bind_native_strat<DamageStrategy, PyDamageStrategy>(m, "DamageStrategy", "damage",
+                                                        base);
+    bind_native_strat<SubsetRandomStrategy, PySubsetRandomStrategy>(
+        m, "SubsetRandomStrategy", "sub-random", base);
+    bind_native_strat<TrimmedRandomStrategy, PyTrimmedRandomStrategy>(
+        m, "TrimmedRandomStrategy", "trim-random", base);
+    bind_native_strat<PreserveStrategy, PyPreserveStrategy>(m, "PreserveStrategy",
+                                                            "preserve", base);
 }
 
 void bind_player(pybind11::object &m)
@@ -326,6 +352,16 @@ class PyConsoleLog : public ConsoleLog, py::trampoline_self_life_support
     using ConsoleLog::ConsoleLog;
 };
 
+class PyNullLog : public NullLog, py::trampoline_self_life_support
+{
+    using NullLog::NullLog;
+};
+
+class PyStatsLog : public StatsLog, py::trampoline_self_life_support
+{
+    using StatsLog::StatsLog;
+};
+
 void bind_log(pybind11::object &m)
 {
     py::class_<BaseLog, PyBaseLog, py::smart_holder> base(m, "BaseLog");
@@ -346,6 +382,22 @@ void bind_log(pybind11::object &m)
         .def("postgame", &BaseLog::postgame);
     py::class_<ConsoleLog, PyConsoleLog, py::smart_holder>(m, "CXXConsoleLog", base)
         .def(py::init<>());
+    py::class_<NullLog, PyNullLog, py::smart_holder> nulllog(m, "NullLog", base);
+    nulllog.def(py::init<>());
+    py::class_<StatsLog, PyStatsLog, py::smart_holder>(m, "StatsLog", nulllog)
+        .def(py::init<>())
+        .def_readonly("start_hp", &StatsLog::startHP)
+        .def_readonly("end_hp", &StatsLog::endHP)
+        .def_readonly("phase_count", &StatsLog::phaseCount)
+        .def_readonly("kills", &StatsLog::kills)
+        .def_readonly("exact_kills", &StatsLog::exactKills)
+        .def_property_readonly("reason",
+                               [](const StatsLog &log) -> py::object
+                               {
+                                   if (!log.ended) { return py::none(); }
+                                   return py::cast(log.reason);
+                               })
+        .def("reset", &StatsLog::reset);
 }
 
 void loadPhaseInfoOrFail(PhaseInfo &info, std::string s)
@@ -356,6 +408,53 @@ void loadPhaseInfoOrFail(PhaseInfo &info, std::string s)
     }
 }
 
+static py::tuple legalMovesOf(const GameState &g)
+{
+    /* the combos the active player can choose from, along with
+     * their bitmasks and the damage (or block) they would deal */
+    std::vector<Combo> combos;
+    g.legalMoves(combos);
+    std::vector<u32> bits;
+    std::vector<i32> values;
+    bits.reserve(combos.size());
+    values.reserve(combos.size());
+    for (const auto &c : combos)
+    {
+        bits.push_back(c.getBitrep());
+        if (g.currentPhaseIsAttack)
+        {
+            values.push_back(g.calcDamageOfCombo(g.enemyPile.front(), c));
+        }
+        else { values.push_back(c.getBaseDefense()); }
+    }
+    return py::make_tuple(combos, bits, values);
+}
+
+static py::tuple legalMovesOfPhase(const PhaseInfo &info)
+{
+    /* no strategy or log is called, they only fill the seats */
+    NullLog log;
+    RandomStrategy strat;
+    GameState g(log, 0);
+    for (i32 i = 0; i < info.numPlayers; ++i) { g.addPlayer(strat); }
+    g.initPhaseInfo(info);
+    g.setup();
+    return legalMovesOf(g);
+}
+
+void loadPhaseInfoFromBytesOrFail(PhaseInfo &info, py::buffer b)
+{
+    py::buffer_info buf = b.request();
+    if (buf.ndim != 1 || buf.itemsize != 1 || (buf.size > 1 && buf.strides[0] != 1))
+    {
+        throw std::invalid_argument("expected a contiguous buffer of bytes");
+    }
+    if (!info.loadFromBytes(static_cast<const u8 *>(buf.ptr), buf.size))
+    {
+        throw std::runtime_error("unable to load info from bytes");
+    }
+}
+
 void bind_phaseinfo(pybind11::object &m)
 {
     py::class_<PhaseInfo>(m, "PhaseInfo")
@@ -376,29 +475,82 @@ void bind_phaseinfo(pybind11::object &m)
         .def_readonly("discard_pile", &PhaseInfo::discardPile)
         .def_readonly("enemy_pile", &PhaseInfo::enemyPile)
         .def_readonly("used_combos", &PhaseInfo::usedPile)
-        .def("__hash__",
-             [](const PhaseInfo &info) { return std::hash<std::string>{}(info.toString()); })
+        .def_property_readonly_static("BYTES_MAX",
+                                      [](py::object self)
+                                      {
+                                          (void)self;
+                                          return PhaseInfo::BYTES_MAX;
+                                      })
+        .def_static("from_bytes",
+                    [](py::buffer b)
+                    {
+                        PhaseInfo info;
+                        loadPhaseInfoFromBytesOrFail(info, b);
+                        return info;
+                    })
+        .def_property_readonly("phase_hash", &PhaseInfo::hash)
+        .def("__hash__", &PhaseInfo::hash)
+        .def(
+            "__eq__", [](const PhaseInfo &a, const PhaseInfo &b) { return a == b; },
+            py::is_operator())
+        .def("legal_moves", &legalMovesOfPhase)
+        .def("to_bytes", [](const PhaseInfo &info) { return py::bytes(info.toBytes()); })
         .def("to_string", &PhaseInfo::toString)
         .def("__str__", &PhaseInfo::toString)
         .def("__repr__", &PhaseInfo::toString)
         .def(py::pickle(
             [](const PhaseInfo& info) { // dump
-                return py::make_tuple(info.toString());
+                return py::make_tuple(py::bytes(info.toBytes()));
             },
             [](py::tuple t) { // load
-                std::string s0 = t[0].cast<std::string>();
                 PhaseInfo info;
-                loadPhaseInfoOrFail(info, s0);
+                if (py::isinstance<py::str>(t[0]))
+                {
+                    /* pickled before the binary format */
+                    loadPhaseInfoOrFail(info, t[0].cast<std::string>());
+                }
+                else { loadPhaseInfoFromBytesOrFail(info, t[0]); }
                 return info;
             }
         ));
 }
 
+static bool runsNatively(const GameState &g)
+{
+    /* only python subclasses of BaseLog and BaseStrategy
+     * call back into python, everything else is pure C++ */
+    if (dynamic_cast<const PyBaseLog *>(&g.getLog()) != nullptr) { return false; }
+    for (const auto &p : g.players)
+    {
+        if (dynamic_cast<const PyBaseStrategy *>(&p.strat) != nullptr) { return false; }
+    }
+    return true;
+}
+
+template <void (GameState::*F)()>
+void runMaybeWithoutGIL(GameState &g)
+{
+    if (runsNatively(g))
+    {
+        py::gil_scoped_release nogil;
+        (g.*F)();
+    }
+    else { (g.*F)(); }
+}
+
 void bind_gamestate(pybind11::object &m)
 {
     py::class_<GameState>(m, "GameState")
-        .def(py::init([](BaseLog &log) { return GameState(log); }),
-             py::keep_alive<1, 2>())
+        .def(py::init(
+                 [](BaseLog &log, std::optional<std::uint64_t> seed)
+                 {
+                     if (seed) { return GameState(log, *seed); }
+                     return GameState(log);
+                 }),
+             py::arg("log"), py::arg("seed") = py::none(), py::keep_alive<1, 2>())
+        .def(
+            "seed", [](GameState &g, std::uint64_t seed) { g.rng.seed(seed); },
+            py::arg("seed"))
         .def("add_player", &GameState::addPlayer, py::keep_alive<1, 2>())
         .def_property_readonly("num_players", &GameState::totalPlayers)
         .def_property_readonly("hand_size", &GameState::getHandSize)
@@ -415,8 +567,41 @@ void bind_gamestate(pybind11::object &m)
         .def("get_current_block", [](GameState &g, Enemy &e) { return g.calcBlock(e); })
         .def("get_combo_damage", &GameState::calcDamageOfCombo)
         .def("get_combo_block", &GameState::calcBlockOfCombo)
-        .def("start_loop", &GameState::startLoop)
-        .def("_step", &GameState::onePhase)
+        .def("start_loop", &runMaybeWithoutGIL<&GameState::startLoop>)
+        .def("_step", &runMaybeWithoutGIL<&GameState::onePhase>)
+        .def_property_readonly("runs_natively", &runsNatively)
+        .def_property_readonly("decision_pending", &GameState::decisionPending)
+        .def_property_readonly("phase_hash", &GameState::phaseHash)
+        .def("legal_moves", &legalMovesOf)
+        .def(
+            "clone",
+            [](const GameState &g, std::optional<std::uint64_t> seed)
+            {
+                GameState c(g);
+                /* a clone must not replay the random choices of the original */
+                c.rng.seed(seed ? *seed : g.rng.next());
+                return c;
+            },
+            py::arg("seed") = py::none(), py::keep_alive<0, 1>())
+        .def(
+            "apply",
+            [](GameState &g, i32 index)
+            {
+                bool applied;
+                if (runsNatively(g))
+                {
+                    py::gil_scoped_release nogil;
+                    applied = g.applyMove(index);
+                }
+                else { applied = g.applyMove(index); }
+                if (!applied)
+                {
+                    throw std::invalid_argument("cannot apply move " +
+                                                std::to_string(index));
+                }
+                return g.status;
+            },
+            py::arg("index"))
         .def("_set_status", [](GameState &g, GameStatus s) { g.status = s; })
         .def_property_readonly("is_runnable", &GameState::gameRunning)
         .def("initialize",
@@ -465,6 +650,37 @@ void bind_gamestate(pybind11::object &m)
              });
 }
 
+static py::array_t<float> locationBatchFromActive(py::sequence phases, py::object out)
+{
+    /* fills out in place, or a new array if out is None */
+    using FloatArray = py::array_t<float, py::array::c_style>;
+    constexpr i32 rows = LocationInfo::rows;
+    constexpr i32 cols = LocationInfo::cols;
+    py::ssize_t count = py::len(phases);
+    std::vector<const PhaseInfo *> ptrs(count);
+    for (py::ssize_t k = 0; k < count; ++k)
+    {
+        ptrs[k] = &phases[k].cast<const PhaseInfo &>();
+    }
+    FloatArray arr;
+    if (out.is_none()) { arr = FloatArray({static_cast<i32>(count), rows, cols}); }
+    else
+    {
+        if (!FloatArray::check_(out))
+        {
+            throw py::type_error("out must be a C-contiguous float32 array");
+        }
+        arr = py::reinterpret_borrow<FloatArray>(out);
+        if (arr.ndim() != 3 || arr.shape(0) != count || arr.shape(1) != rows ||
+            arr.shape(2) != cols)
+        {
+            throw std::invalid_argument("out must have shape (len(phases), 55, 9)");
+        }
+    }
+    LocationInfo::batchFromActive(ptrs.data(), count, arr.mutable_data());
+    return arr;
+}
+
 void bind_location(pybind11::object &m)
 {
     py::class_<LocationInfo, std::shared_ptr<LocationInfo>>(m, "LocationInfo",
@@ -475,6 +691,11 @@ void bind_location(pybind11::object &m)
         .def_static("fromGameState", &LocationInfo::fromGameState)
         .def_static("from_active", &LocationInfo::fromActivePlayer)
         .def_static("fromActivePlayer", &LocationInfo::fromActivePlayer)
+        .def_static("batch_from_active", &locationBatchFromActive, py::arg("phases"),
+                    py::arg("out") = py::none(),
+                    "from_active(phase, phase.active_player) for every phase,\n"
+                    "written into a (len(phases), 55, 9) float32 array.\n"
+                    "out is filled in place if given, else a new array is returned")
         .def_property_readonly("num_jokers", &LocationInfo::getNumJokers)
         .def_property_readonly("num_players", &LocationInfo::getNumPlayers)
         .def_property_readonly("valid", &LocationInfo::getValid)
@@ -495,6 +716,115 @@ void bind_location(pybind11::object &m)
             });
 }
 
+static py::array_t<i32> batchArray(const BatchResult &res, const std::vector<i32> &v)
+{
+    py::array_t<i32> arr({res.numPhases, res.gamesPerPhase});
+    std::copy(v.begin(), v.end(), arr.mutable_data());
+    return arr;
+}
+
+void bind_batch(pybind11::module_ &m)
+{
+    m.def(
+        "simulate_batch",
+        [](const std::vector<PhaseInfo> &phases, std::string strategy, i32 n,
+           std::optional<std::uint64_t> seed, bool compact)
+        {
+            if (n < 1) { throw std::invalid_argument("n must be at least 1"); }
+            std::unique_ptr<Strategy> strat = makeNativeStrategy(strategy);
+            RolloutPolicy policy;
+            bool fast = compact && rolloutPolicyByName(strategy, policy);
+            Rng seeder = seed ? Rng(*seed) : Rng();
+            BatchResult res;
+            {
+                py::gil_scoped_release nogil;
+                simulateBatch(phases, *strat, fast ? &policy : nullptr, n, seeder, res);
+            }
+            py::dict result;
+            result["end_value"] = batchArray(res, res.endValues);
+            result["enemy_hp"] = batchArray(res, res.enemyHPLeft);
+            result["phase_count"] = batchArray(res, res.phaseCounts);
+            result["reason"] = batchArray(res, res.reasons);
+            return result;
+        },
+        py::arg("phases"), py::arg("strategy") = "random", py::arg("n") = 1,
+        py::arg("seed") = py::none(), py::arg("compact") = true,
+        "play n games from each phase with a native strategy,\n"
+        "returns a dict of (len(phases), n) arrays.\n"
+        "compact=False plays every game with a full GameState");
+}
+
+static std::vector<Combo> rootMoves(const MCTSSearch &s)
+{
+    auto start = s.moves.begin() + s.moveStart[0];
+    return std::vector<Combo>(start, start + s.moveCount[0]);
+}
+
+template <typename T>
+static std::vector<T> perRootMove(const MCTSSearch &s, const std::vector<T> &stat)
+{
+    /* statistic of the child for each root move, zero if not expanded */
+    std::vector<T> res(s.moveCount[0], T(0));
+    for (u32 i = 0; i < s.moveCount[0]; ++i)
+    {
+        i32 child = s.childOf[s.moveStart[0] + i];
+        if (child >= 0) { res[i] = stat[child]; }
+    }
+    return res;
+}
+
+void bind_mcts(pybind11::module_ &m)
+{
+    py::class_<MCTSSearch>(m, "MCTSSearch")
+        .def(py::init(
+                 [](const PhaseInfo &phase, bool trim, double weight, std::string rollout,
+                    std::optional<std::uint64_t> seed)
+                 {
+                     RolloutPolicy policy;
+                     if (!rolloutPolicyByName(rollout, policy))
+                     {
+                         throw std::invalid_argument("no rollout policy named " +
+                                                     rollout);
+                     }
+                     Rng seeder = seed ? Rng(*seed) : Rng();
+                     return std::make_unique<MCTSSearch>(phase, trim, weight, policy,
+                                                         seeder.next());
+                 }),
+             py::arg("phase"), py::arg("trim") = true, py::arg("weight") = std::sqrt(2.0),
+             py::arg("rollout") = "sub-random", py::arg("seed") = py::none())
+        .def("run", &MCTSSearch::run, py::arg("iterations"),
+             py::call_guard<py::gil_scoped_release>())
+        .def_readonly("root_phase", &MCTSSearch::rootPhase)
+        .def_property_readonly("num_nodes", &MCTSSearch::numNodes)
+        .def_property_readonly("visits", [](const MCTSSearch &s) { return s.visits[0]; })
+        .def_property_readonly("value", [](const MCTSSearch &s) { return s.values[0]; })
+        .def_property_readonly("moves", &rootMoves)
+        .def_property_readonly("move_visits",
+                               [](const MCTSSearch &s) { return perRootMove(s, s.visits); })
+        .def_property_readonly("move_values",
+                               [](const MCTSSearch &s) { return perRootMove(s, s.values); })
+        .def_property_readonly("best_index",
+                               [](const MCTSSearch &s)
+                               {
+                                   i32 best = s.bestChild(0);
+                                   return (best < 0) ? -1 : s.prevIndex[best];
+                               })
+        .def("reroot", &MCTSSearch::reroot, py::arg("phase"))
+        .def(
+            "phase_after",
+            [](MCTSSearch &s, u32 i)
+            {
+                if (i >= s.moveCount[0])
+                {
+                    throw std::out_of_range("no root move " + std::to_string(i));
+                }
+                PhaseInfo info;
+                s.phaseAfterMove(s.moveStart[0] + i, info);
+                return info;
+            },
+            py::arg("index"));
+}
+
 PYBIND11_MODULE(core, m)
 {
     m.doc() = "c++ module for regicide game mechanics";
@@ -506,4 +836,6 @@ PYBIND11_MODULE(core, m)
     bind_phaseinfo(m);
     bind_location(m);
     bind_gamestate(m);
+    bind_batch(m);
+    bind_mcts(m);
 }
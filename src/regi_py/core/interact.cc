@@ -7,8 +7,16 @@ namespace regi
     {
         Combo def;
         Strategy &strat = player.strat;
+        i32 res;
 
-        if (strat.provideDefense(def, player, damage, *this) < 0)
+        if (forcedMove >= 0)
+        {
+            std::vector<Combo> combos;
+            collectDefenses(player.cards, damage, combos);
+            res = provideForced(def, combos);
+        }
+        else { res = strat.provideDefense(def, player, damage, *this); }
+        if (res < 0)
         {
             player.alive = false;
             gameOver(BLOCK_FAILED);
@@ -20,6 +28,7 @@ namespace regi
             {
                 if (*it == def.parts[i])
                 {
+                    hash.hands -= PhaseHash::handKey(*it, player.id);
                     player.cards.erase(it);
                     break;
                 }
@@ -27,15 +36,27 @@ namespace regi
         }
         log.defend(player, def, damage, *this);
         // add to discard pile
-        for (Card &c : def.parts) { discardPile.push_back(c); }
+        for (Card &c : def.parts)
+        {
+            hash.discard.pushBack(PhaseHash::discardKey(c));
+            discardPile.push_back(c);
+        }
     }
 
     void GameState::selectAttack(Player &player, bool yieldAllowed)
     {
         Combo atk;
         Strategy &strat = player.strat;
+        i32 res;
 
-        if (strat.provideAttack(atk, player, yieldAllowed, *this) < 0)
+        if (forcedMove >= 0)
+        {
+            std::vector<Combo> combos;
+            collectAttacks(player.cards, yieldAllowed, combos);
+            res = provideForced(atk, combos);
+        }
+        else { res = strat.provideAttack(atk, player, yieldAllowed, *this); }
+        if (res < 0)
         {
             player.alive = false;
             gameOver(ATTACK_FAILED);
@@ -49,6 +70,7 @@ namespace regi
             {
                 if (*it == atk.parts[i])
                 {
+                    hash.hands -= PhaseHash::handKey(*it, player.id);
                     player.cards.erase(it);
                     break;
                 }
@@ -56,6 +78,7 @@ namespace regi
         }
 
         // add to used pile
+        hash.used.pushBack(PhaseHash::comboKey(atk));
         usedPile.push_back(atk);
     }
 
@@ -77,4 +100,72 @@ namespace regi
         activePlayerID = nextPlayerID;
     }
 
+    i32 GameState::provideForced(Combo &result, const std::vector<Combo> &combos)
+    {
+        i32 ind = forcedMove;
+        forcedMove = -1;
+        if (ind < 0 || ind >= combos.size()) { return -1; }
+        result = combos[ind];
+        return 0;
+    }
+
+    bool GameState::yieldAllowed() const
+    {
+        return pastYieldsInARow < (totalPlayers() - 1);
+    }
+
+    i32 GameState::pendingDamage() const
+    {
+        if (enemyPile.empty()) { return 0; }
+        const Enemy &enemy = enemyPile.front();
+        return enemy.strength() - calcBlock(enemy);
+    }
+
+    bool GameState::decisionPending() const
+    {
+        /* would the next phase ask the active player's strategy for a move? */
+        if (!gameRunning()) { return false; }
+        if (activePlayerID < 0 || activePlayerID >= totalPlayers()) { return false; }
+        const Player &player = players[activePlayerID];
+        if (!player.alive || enemyPile.empty()) { return false; }
+        if (currentPhaseIsAttack) { return !player.cards.empty() || yieldAllowed(); }
+        i32 damage = pendingDamage();
+        if (damage <= 0) { return false; }
+        i32 tblock = 0;
+        for (const auto &c : player.cards) { tblock += c.strength(); }
+        return damage <= tblock;
+    }
+
+    void GameState::legalMoves(std::vector<Combo> &combos) const
+    {
+        /* same combos in the same order as the strategy would get */
+        combos.clear();
+        if (!decisionPending()) { return; }
+        const Player &player = players[activePlayerID];
+        if (currentPhaseIsAttack) { collectAttacks(player.cards, yieldAllowed(), combos); }
+        else { collectDefenses(player.cards, pendingDamage(), combos); }
+    }
+
+    bool GameState::applyMove(i32 index)
+    {
+        /* play the given legal move for the active player, and
+         * continue until the next move is needed or the game ends */
+        std::vector<Combo> combos;
+        legalMoves(combos);
+        if (index < 0 || index >= combos.size()) { return false; }
+        forcedMove = index;
+        do
+        {
+            log.state(*this);
+            onePhase();
+        } while (gameRunning() && !decisionPending());
+        forcedMove = -1;
+        if (!gameRunning())
+        {
+            status = GameStatus::ENDED;
+            postGameResult();
+        }
+        return true;
+    }
+
 } /* namespace regi */
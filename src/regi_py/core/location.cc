@@ -72,6 +72,11 @@ namespace regi
         for (auto &c : pile) this->setCard(c, j);
     }
 
+    void LocationInfo::setCards(const ComboParts &pile, LocationStatus j)
+    {
+        for (auto &c : pile) this->setCard(c, j);
+    }
+
     void LocationInfo::setSurroundings(const std::vector<Card> &drawPile,
                                        const std::vector<Card> &discardPile,
                                        const std::vector<Enemy> &enemyPile,
@@ -216,28 +221,23 @@ namespace regi
         }
     }
 
-    std::shared_ptr<LocationInfo> LocationInfo::fromActivePlayer(const PhaseInfo &p,
-                                                                 i32 activeID)
+    void LocationInfo::loadActivePlayer(const PhaseInfo &p, i32 activeID)
     {
         i32 i;
         float table[MAX_LOCATIONS] = {0.0};
         //
-        std::shared_ptr<LocationInfo> result = std::make_shared<LocationInfo>();
-        result->numJokers = 0;
-        result->numPlayers = p.numPlayers;
+        numJokers = 0;
+        numPlayers = p.numPlayers;
 
         // for the active player
         // they know their own cards
-        result->setCards(p.player_cards[activeID], LocationStatus::WITH_PLAYER_1);
+        setCards(p.player_cards[activeID], LocationStatus::WITH_PLAYER_1);
         // they know what cards are in the used pile
-        for (auto &q : p.usedPile)
-        {
-            result->setCards(q.parts, LocationStatus::IN_USED_PILE);
-        }
+        for (auto &q : p.usedPile) { setCards(q.parts, LocationStatus::IN_USED_PILE); }
         // they know all alive enemies are in the enemy pile
         if (p.enemyPile.size() > 0)
         {
-            result->setCards(p.enemyPile, LocationStatus::IN_ENEMY_PILE);
+            setCards(p.enemyPile, LocationStatus::IN_ENEMY_PILE);
         }
 
         // everything else can be anywhere, so
@@ -245,28 +245,59 @@ namespace regi
         fillProbs(p, activeID, table);
 
         // set joker count explicitly
-        if (result->numPlayers >= 2)
+        if (numPlayers >= 2)
         {
-            result->numJokers = result->numPlayers - 2;
-            for (i = 1; i < 1 + result->numJokers; ++i) { result->setProbs(i, table); }
-            for (; i < 3; ++i) { result->set(i, 0); }
+            numJokers = numPlayers - 2;
+            for (i = 1; i < 1 + numJokers; ++i) { setProbs(i, table); }
+            for (; i < 3; ++i) { set(i, 0); }
         }
 
-        for (i = 3; i < MAX_CARDS_IN_GAME; ++i) { result->setProbs(i, table); }
-        result->setYield();
+        for (i = 3; i < MAX_CARDS_IN_GAME; ++i) { setProbs(i, table); }
+        setYield();
         // no validation
+    }
+
+    std::shared_ptr<LocationInfo> LocationInfo::fromActivePlayer(const PhaseInfo &p,
+                                                                 i32 activeID)
+    {
+        std::shared_ptr<LocationInfo> result = std::make_shared<LocationInfo>();
+        result->loadActivePlayer(p, activeID);
         return result;
     };
 
+    void LocationInfo::batchFromActive(const PhaseInfo *const *phases, i32 count,
+                                       float *out)
+    {
+        for (i32 k = 0; k < count; ++k)
+        {
+            LocationInfo view(out + k * rows * cols);
+            view.loadActivePlayer(*phases[k], phases[k]->activePlayerID);
+        }
+    }
+
     LocationInfo::LocationInfo()
     {
         /* TODO: (ahgamut) new */
         data = new float[rows * cols];
+        owned = true;
+        numJokers = 0;
+        numPlayers = 0;
+        valid = false;
+        for (i32 x = 0; x < rows * cols; ++x) { data[x] = 0.0; }
+    };
+
+    LocationInfo::LocationInfo(float *buf)
+    {
+        data = buf;
+        owned = false;
         numJokers = 0;
         numPlayers = 0;
         valid = false;
         for (i32 x = 0; x < rows * cols; ++x) { data[x] = 0.0; }
     };
 
-    LocationInfo::~LocationInfo() { delete[] data; };
+    LocationInfo::~LocationInfo()
+    {
+        if (owned) { delete[] data; }
+    };
 } /* namespace regi */
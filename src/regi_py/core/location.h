@@ -27,15 +27,20 @@ namespace regi
     {
        private:
         float *data;
+        bool owned; /* false if data is a view of a caller's buffer */
         i32 numJokers;
         i32 numPlayers;
         bool valid;
+        void loadActivePlayer(const PhaseInfo &, i32);
 
        public:
         static constexpr i32 rows = MAX_CARDS_IN_GAME;
         static constexpr i32 cols = MAX_LOCATIONS;
         //
         LocationInfo();
+        explicit LocationInfo(float *); /* rows * cols floats, zeroed here */
+        LocationInfo(const LocationInfo &) = delete;
+        LocationInfo &operator=(const LocationInfo &) = delete;
         ~LocationInfo();
         //
         void set(i32 i, i32 j, float v = 1.0) { this->data[i * cols + j] = v; }
@@ -53,6 +58,7 @@ namespace regi
         void setJokers();
         void setCards(const std::vector<Card> &, LocationStatus j);
         void setCards(const std::vector<Enemy> &, LocationStatus j);
+        void setCards(const ComboParts &, LocationStatus j);
         void setSurroundings(const std::vector<Card> &,  //
                              const std::vector<Card> &,  //
                              const std::vector<Enemy> &, const std::vector<Combo> &);
@@ -70,6 +76,9 @@ namespace regi
         static std::shared_ptr<LocationInfo> fromPhaseInfo(const PhaseInfo &);
         static std::shared_ptr<LocationInfo> fromGameState(const GameState &);
         static std::shared_ptr<LocationInfo> fromActivePlayer(const PhaseInfo &, i32);
+        /* fromActivePlayer of each phase's active player, written into
+         * out[k * rows * cols ...] for the k-th phase */
+        static void batchFromActive(const PhaseInfo *const *, i32, float *);
     };
 } /* namespace regi */
 
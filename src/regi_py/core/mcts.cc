@@ -0,0 +1,304 @@
+#include <mcts.h>
+#include <cmath>
+#include <limits>
+#include <utility>
+
+namespace regi
+{
+    double shapedReward(i32 s, i32 e, i32 phases)
+    {
+        double endValue = (360 - e) / 360.0;
+        double pacing = (phases > 0) ? static_cast<double>(s - e) / phases : 0.0;
+        double reward = phases / 50.0;
+        // penalize games that are immediate losses (throwy)
+        if (phases <= 3 && e > 0)
+        {
+            if (s > 280) { return -1; }
+            if (s > 220) { return -0.75; }
+            if (s > 160) { return -0.25; }
+            return -0.0625;
+        }
+        // more if checkpoints are crossed
+        if (s > 280 && e <= 220) { reward += endValue; }
+        if (s > 220 && e <= 160) { reward += endValue; }
+        if (s > 160 && e <= 120) { reward += endValue; }
+        if (s > 120 && e <= 80) { reward += endValue; }
+        if (s > 80 && e <= 40) { reward += endValue; }
+        if (s > 40 && e <= 0) { reward += 3 * endValue; }
+        // penalize games that are too slow-paced
+        if (pacing < 2.1) { return reward / 2; }
+        return reward;
+    }
+
+    MCTSSearch::MCTSSearch(const PhaseInfo &info, bool trim_, double weight_,
+                           RolloutPolicy policy_, std::uint64_t seed)
+        : log(), seat(), trim(trim_), weight(weight_), policy(policy_), rng(seed),
+          rootPhase(info)
+    {
+        GameState g(log, rng.next());
+        for (i32 i = 0; i < info.numPlayers; ++i) { g.addPlayer(seat); }
+        g.initPhaseInfo(info);
+        g.setup();
+        /* a loaded game is never over, the phase knows if it was */
+        addNode(std::move(g), -1, -1, info.gameHasEnded);
+    }
+
+    i32 MCTSSearch::addNode(GameState &&g, i32 parent, i32 prev, i32 endValue)
+    {
+        i32 id = numNodes();
+        parents.push_back(parent);
+        prevIndex.push_back(prev);
+        visits.push_back(0);
+        values.push_back(0.0);
+        endValues.push_back(endValue);
+        hpLeft.push_back(g.enemyHPLeft());
+
+        // moves as get_expansion_at finds them
+        std::vector<Combo> all;
+        if (endValues[id] == 0) { g.legalMoves(all); }
+        u32 count = all.size();
+        u32 kept[1u << MAX_COMBO_CARDS];
+        u32 sizes[1u << MAX_COMBO_CARDS];
+        i32 blocks[1u << MAX_COMBO_CARDS];
+        for (u32 i = 0; i < count; ++i)
+        {
+            kept[i] = i;
+            sizes[i] = all[i].parts.size();
+            blocks[i] = all[i].getBaseDefense();
+        }
+        if (trim && g.currentPhaseIsAttack)
+        {
+            count = nonbadAttacks(sizes, count, rng, kept);
+        }
+        else if (trim) { count = nonbadDefenses(sizes, blocks, count, rng, kept); }
+
+        moveStart.push_back(moves.size());
+        moveCount.push_back(count);
+        untriedCount.push_back(count);
+        for (u32 i = 0; i < count; ++i)
+        {
+            moves.push_back(all[kept[i]]);
+            legalIndex.push_back(kept[i]);
+            childOf.push_back(-1);
+            untried.push_back(i);
+        }
+        u32 *u = untried.data() + moveStart[id];
+        shuffleUntried(u, count);
+        states.push_back(std::move(g));
+        return id;
+    }
+
+    void MCTSSearch::shuffleUntried(u32 *u, u32 count)
+    {
+        for (u32 i = count; i > 1; --i) { std::swap(u[i - 1], u[rng.below(i)]); }
+    }
+
+    i32 MCTSSearch::select() const
+    {
+        i32 node = 0;
+        while (untriedCount[node] == 0 && endValues[node] == 0)
+        {
+            i32 best = -1;
+            double bestScore = -std::numeric_limits<double>::infinity();
+            for (u32 i = moveStart[node]; i < moveStart[node] + moveCount[node]; ++i)
+            {
+                if (childOf[i] < 0) { continue; }
+                double score = ucb1(childOf[i], node);
+                if (best < 0 || score > bestScore)
+                {
+                    best = childOf[i];
+                    bestScore = score;
+                }
+            }
+            /* no moves at all, nothing to do but play it out */
+            if (best < 0) { break; }
+            node = best;
+        }
+        return node;
+    }
+
+    double MCTSSearch::ucb1(i32 node, i32 parent) const
+    {
+        if (visits[node] == 0) { return std::numeric_limits<double>::infinity(); }
+        double v1 = values[node] / visits[node];
+        double v2 = std::sqrt(std::log(static_cast<double>(visits[parent])) /
+                              visits[node]);
+        return v1 + weight * v2;
+    }
+
+    i32 MCTSSearch::expand(i32 node)
+    {
+        untriedCount[node] -= 1;
+        u32 i = untried[moveStart[node] + untriedCount[node]];
+        GameState g(states[node]);
+        /* a clone must not replay the random choices of the original */
+        g.rng.seed(rng.next());
+        g.applyMove(legalIndex[moveStart[node] + i]);
+        i32 endValue = g.endValue();
+        i32 child = addNode(std::move(g), node, i, endValue);
+        childOf[moveStart[node] + i] = child;
+        return child;
+    }
+
+    double MCTSSearch::simulate(i32 node)
+    {
+        if (endValues[node] != 0) { return (endValues[node] == 1) ? 1.0 : 0.0; }
+        states[node].loadPhaseInfoForExport(scratch);
+        Rollout r;
+        if (r.load(scratch))
+        {
+            r.rng.seed(rng.next());
+            r.play(policy);
+            return shapedReward(hpLeft[node], r.enemyHPLeft(), r.phaseCount);
+        }
+        /* the seats play it out if the compact state cannot hold it */
+        GameState g(states[node]);
+        g.rng.seed(rng.next());
+        i32 start = g.phaseCount;
+        g.startLoop();
+        return shapedReward(hpLeft[node], g.enemyHPLeft(), g.phaseCount - start);
+    }
+
+    void MCTSSearch::update(i32 node, double reward)
+    {
+        for (; node >= 0; node = parents[node])
+        {
+            visits[node] += 1;
+            values[node] += reward;
+        }
+    }
+
+    void MCTSSearch::run(i32 iterations)
+    {
+        for (i32 it = 0; it < iterations; ++it)
+        {
+            i32 node = select();
+            if (endValues[node] == 0 && untriedCount[node] != 0)
+            {
+                node = expand(node);
+            }
+            update(node, simulate(node));
+        }
+    }
+
+    i32 MCTSSearch::bestChild(i32 node) const
+    {
+        /* ties go to the child expanded first, as in MCTSNode, since
+         * moves are expanded in shuffled order and node ids follow it */
+        i32 best = -1;
+        for (u32 i = moveStart[node]; i < moveStart[node] + moveCount[node]; ++i)
+        {
+            i32 child = childOf[i];
+            if (child < 0) { continue; }
+            if (best < 0 || visits[child] > visits[best] ||
+                (visits[child] == visits[best] && child < best))
+            {
+                best = child;
+            }
+        }
+        return best;
+    }
+
+    i32 MCTSSearch::find(const PhaseInfo &info)
+    {
+        /* parents have smaller ids than their children, so this looks
+         * at shallow nodes first, the hash skips most of the exports */
+        if (rootPhase == info) { return 0; }
+        std::uint64_t h = info.hash();
+        for (i32 node = 1; node < numNodes(); ++node)
+        {
+            if (states[node].phaseHash() != h) { continue; }
+            states[node].loadPhaseInfoForExport(scratch);
+            if (scratch == info) { return node; }
+        }
+        return -1;
+    }
+
+    bool MCTSSearch::reroot(const PhaseInfo &info)
+    {
+        i32 top = find(info);
+        if (top < 0) { return false; }
+        if (top == 0) { return true; }
+
+        /* new ids keep the old order, so parents still come before
+         * their children and ties in bestChild are broken the same way */
+        std::vector<i32> newId(numNodes(), -1);
+        i32 count = 0;
+        newId[top] = count++;
+        for (i32 node = top + 1; node < numNodes(); ++node)
+        {
+            if (newId[parents[node]] >= 0) { newId[node] = count++; }
+        }
+
+        std::vector<i32> parents_, prevIndex_, visits_, endValues_, hpLeft_;
+        std::vector<double> values_;
+        std::vector<u32> moveStart_, moveCount_, untriedCount_, untried_;
+        std::vector<Combo> moves_;
+        std::vector<i32> legalIndex_, childOf_;
+        std::vector<GameState> states_;
+        states_.reserve(count);
+        for (i32 node = top; node < numNodes(); ++node)
+        {
+            if (newId[node] < 0) { continue; }
+            bool root = (node == top);
+            parents_.push_back(root ? -1 : newId[parents[node]]);
+            prevIndex_.push_back(root ? -1 : prevIndex[node]);
+            visits_.push_back(visits[node]);
+            values_.push_back(values[node]);
+            endValues_.push_back(endValues[node]);
+            hpLeft_.push_back(hpLeft[node]);
+            moveStart_.push_back(moves_.size());
+            moveCount_.push_back(moveCount[node]);
+            untriedCount_.push_back(untriedCount[node]);
+            for (u32 i = moveStart[node]; i < moveStart[node] + moveCount[node]; ++i)
+            {
+                moves_.push_back(moves[i]);
+                legalIndex_.push_back(legalIndex[i]);
+                childOf_.push_back((childOf[i] < 0) ? -1 : newId[childOf[i]]);
+                untried_.push_back(untried[i]);
+            }
+            states_.push_back(std::move(states[node]));
+        }
+
+        parents.swap(parents_);
+        prevIndex.swap(prevIndex_);
+        visits.swap(visits_);
+        values.swap(values_);
+        endValues.swap(endValues_);
+        hpLeft.swap(hpLeft_);
+        moveStart.swap(moveStart_);
+        moveCount.swap(moveCount_);
+        untriedCount.swap(untriedCount_);
+        moves.swap(moves_);
+        legalIndex.swap(legalIndex_);
+        childOf.swap(childOf_);
+        untried.swap(untried_);
+        states.swap(states_);
+        rootPhase = info;
+        return true;
+    }
+
+    void MCTSSearch::exportPhase(i32 node, PhaseInfo &info)
+    {
+        if (node == 0)
+        {
+            info = rootPhase;
+            return;
+        }
+        states[node].loadPhaseInfoForExport(info);
+    }
+
+    void MCTSSearch::phaseAfterMove(u32 i, PhaseInfo &info)
+    {
+        /* the phase the search saw after a root move, or a fresh sample */
+        if (childOf[i] >= 0)
+        {
+            exportPhase(childOf[i], info);
+            return;
+        }
+        GameState g(states[0]);
+        g.rng.seed(rng.next());
+        g.applyMove(legalIndex[i]);
+        g.loadPhaseInfoForExport(info);
+    }
+} /* namespace regi */
@@ -0,0 +1,76 @@
+#ifndef MCTS_H
+#define MCTS_H
+#include <regi.h>
+#include <dfsel.h>
+#include <phaseinfo.h>
+#include <rollout.h>
+#include <statslog.h>
+#include <cstdint>
+#include <vector>
+
+namespace regi
+{
+    /* reward of a playout, as MCTSNode.simulate in strats/mcts_explorer.py:
+     * from enemy hp at the start, enemy hp at the end and phases played */
+    double shapedReward(i32, i32, i32);
+
+    /* UCB1 search over the moves of a phase, as MCTSNode does it in
+     * python. node statistics are flat arrays indexed by node id, with
+     * the root at 0. the moves of node k are moves[moveStart[k] ...] and
+     * childOf holds the node each move leads to, -1 if not expanded.
+     * every node keeps its game, a child is a clone of its parent with
+     * the move applied, so seats are filled by RandomStrategy (which
+     * also picks redirects), like get_expansion_at does. reroot keeps
+     * the subtree of a node with the given phase, as MCTSNode.find and
+     * tree reuse in MCTSExplorerStrategy do. */
+    struct MCTSSearch
+    {
+       private:
+        NullLog log;
+        RandomStrategy seat;
+        std::vector<GameState> states;
+        PhaseInfo scratch;
+        i32 addNode(GameState &&, i32, i32, i32);
+        void shuffleUntried(u32 *, u32);
+        i32 select() const;
+        i32 expand(i32);
+        double simulate(i32);
+        void update(i32, double);
+        double ucb1(i32, i32) const;
+
+       public:
+        bool trim;
+        double weight;
+        RolloutPolicy policy;
+        Rng rng;
+        PhaseInfo rootPhase;
+        // per node
+        std::vector<i32> parents;
+        std::vector<i32> prevIndex; /* index of the move in its parent's moves */
+        std::vector<i32> visits;
+        std::vector<double> values;
+        std::vector<i32> endValues;
+        std::vector<i32> hpLeft;
+        std::vector<u32> moveStart;
+        std::vector<u32> moveCount;
+        std::vector<u32> untriedCount; /* untried[moveStart ...] still to expand */
+        // per move
+        std::vector<Combo> moves;
+        std::vector<i32> legalIndex; /* index for GameState::applyMove */
+        std::vector<i32> childOf;
+        std::vector<u32> untried;
+
+        MCTSSearch(const PhaseInfo &, bool, double, RolloutPolicy, std::uint64_t);
+        MCTSSearch(const MCTSSearch &) = delete;
+        MCTSSearch &operator=(const MCTSSearch &) = delete;
+        void run(i32);
+        i32 numNodes() const { return static_cast<i32>(parents.size()); }
+        i32 bestChild(i32) const;
+        i32 find(const PhaseInfo &);
+        bool reroot(const PhaseInfo &);
+        void exportPhase(i32, PhaseInfo &);
+        void phaseAfterMove(u32, PhaseInfo &);
+    };
+} /* namespace regi */
+
+#endif
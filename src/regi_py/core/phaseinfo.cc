@@ -116,6 +116,7 @@ namespace regi
                 if (!usedPile[i].parts[j].fromIndex(ind)) { return false; }
                 if ((j + 1) != usedPile[i].parts.size()) { EXPECT_SEPARATOR(ss, SEP3); }
             }
+            usedPile[i].loadDetails();
             if ((i + 1) != usedPile.size()) { EXPECT_SEPARATOR(ss, SEP2); }
         }
         EXPECT_SEPARATOR(ss, SEP1);
@@ -195,6 +196,193 @@ namespace regi
         return ss.str();
     }
 
+    /* binary layout, one byte per field:
+     *   version, gameHasEnded, attack, numPlayers, activePlayerID, pastYieldsInARow,
+     *   size of each hand, enemies, draw pile, discard pile, used pile bytes,
+     *   cards of each hand, (card, hp) of each enemy, draw pile, discard pile,
+     *   used pile.
+     * cards are toIndex() values (< 128). in the used pile the first card
+     * of each combo has the top bit set, and a yield is a lone 0xFF.
+     * BYTES_VERSION and BYTES_MAX are in phaseinfo.h */
+    static constexpr u8 COMBO_START = 0x80;
+    static constexpr u8 COMBO_YIELD = 0xFF;
+
+    std::string PhaseInfo::toBytes() const
+    {
+        std::string b;
+        b.reserve(BYTES_MAX);
+        auto put = [&b](i32 x) { b.push_back(static_cast<char>(x)); };
+        // metadata
+        put(BYTES_VERSION);
+        put(gameHasEnded);
+        put(currentPhaseIsAttack ? 1 : 0);
+        put(numPlayers);
+        put(activePlayerID);
+        put(pastYieldsInARow);
+        // sizes
+        i32 usedBytes = 0;
+        for (const auto &combo : usedPile) { usedBytes += std::max<i32>(combo.parts.size(), 1); }
+        for (i32 i = 0; i < numPlayers; ++i) { put(player_cards[i].size()); }
+        put(enemyPile.size());
+        put(drawPile.size());
+        put(discardPile.size());
+        put(usedBytes);
+        // cards
+        for (i32 i = 0; i < numPlayers; ++i)
+        {
+            for (const auto &c : player_cards[i]) { put(c.toIndex()); }
+        }
+        for (const auto &e : enemyPile)
+        {
+            put(e.toIndex());
+            put(e.hp);
+        }
+        for (const auto &c : drawPile) { put(c.toIndex()); }
+        for (const auto &c : discardPile) { put(c.toIndex()); }
+        for (const auto &combo : usedPile)
+        {
+            if (combo.parts.empty()) { put(COMBO_YIELD); }
+            for (u64 j = 0; j < combo.parts.size(); ++j)
+            {
+                put(combo.parts[j].toIndex() | (j == 0 ? COMBO_START : 0));
+            }
+        }
+        return b;
+    }
+
+    bool PhaseInfo::loadFromBytes(const u8 *data, u64 len)
+    {
+        u64 pos = 0;
+        auto get = [&](i32 &target, i32 lower, i32 upper) -> bool
+        {
+            if (pos >= len) { return false; }
+            target = data[pos++];
+            return target >= lower && target <= upper;
+        };
+        auto getSigned = [&](i32 &target, i32 lower, i32 upper) -> bool
+        {
+            if (pos >= len) { return false; }
+            target = static_cast<std::int8_t>(data[pos++]);
+            return target >= lower && target <= upper;
+        };
+        auto getCard = [&](Card &c) -> bool
+        {
+            i32 ind;
+            return get(ind, 0, 70) && c.fromIndex(ind);
+        };
+        i32 ind;
+        // metadata
+        if (!get(ind, BYTES_VERSION, BYTES_VERSION)) { return false; }
+        if (!getSigned(gameHasEnded, -1, 1)) { return false; }
+        if (!get(ind, 0, 1)) { return false; }
+        currentPhaseIsAttack = (ind == 1);
+        if (!get(numPlayers, 2, 4)) { return false; }
+        if (!get(activePlayerID, 0, numPlayers - 1)) { return false; }
+        if (!get(pastYieldsInARow, 0, numPlayers - 1)) { return false; }
+        // sizes
+        i32 handSizes[4];
+        i32 enemies, draws, discards, usedBytes;
+        for (i32 i = 0; i < numPlayers; ++i)
+        {
+            if (!get(handSizes[i], 0, 9 - numPlayers)) { return false; }
+        }
+        if (!get(enemies, 0, 12)) { return false; }
+        if (!get(draws, 0, 54)) { return false; }
+        if (!get(discards, 0, 54)) { return false; }
+        if (!get(usedBytes, 0, 64)) { return false; }
+        // cards
+        player_cards.resize(numPlayers);
+        for (i32 i = 0; i < numPlayers; ++i)
+        {
+            player_cards[i].resize(handSizes[i]);
+            for (auto &c : player_cards[i])
+            {
+                if (!getCard(c)) { return false; }
+            }
+        }
+        enemyPile.resize(enemies);
+        for (auto &e : enemyPile)
+        {
+            if (!getCard(e) || !getSigned(e.hp, -40, 40)) { return false; }
+        }
+        drawPile.resize(draws);
+        for (auto &c : drawPile)
+        {
+            if (!getCard(c)) { return false; }
+        }
+        discardPile.resize(discards);
+        for (auto &c : discardPile)
+        {
+            if (!getCard(c)) { return false; }
+        }
+        usedPile.clear();
+        for (i32 i = 0; i < usedBytes; ++i)
+        {
+            if (!get(ind, 0, 255)) { return false; }
+            if ((ind & COMBO_START) != 0)
+            {
+                if (usedPile.size() == 16) { return false; }
+                usedPile.emplace_back();
+                if (ind == COMBO_YIELD) { continue; }
+            }
+            else if (usedPile.empty() || usedPile.back().parts.empty()) { return false; }
+            Combo &combo = usedPile.back();
+            if (combo.parts.size() == 4) { return false; }
+            combo.parts.push_back(Card());
+            if (!combo.parts[combo.parts.size() - 1].fromIndex(ind & ~COMBO_START))
+            {
+                return false;
+            }
+        }
+        for (auto &combo : usedPile) { combo.loadDetails(); }
+        // done
+        return pos == len;
+    }
+
+    std::uint64_t PhaseInfo::hash() const
+    {
+        /* same value as GameState::phaseHash of the exported game */
+        PhaseHash h;
+        for (i32 i = 0; i < player_cards.size(); ++i) { h.addHand(i, player_cards[i]); }
+        h.loadPiles(drawPile, enemyPile, discardPile, usedPile);
+        return h.value(gameHasEnded, currentPhaseIsAttack, numPlayers, activePlayerID,
+                       pastYieldsInARow);
+    }
+
+    bool PhaseInfo::operator==(const PhaseInfo &other) const
+    {
+        auto sameEnemies = [](const std::vector<Enemy> &a, const std::vector<Enemy> &b)
+        {
+            if (a.size() != b.size()) { return false; }
+            for (u64 i = 0; i < a.size(); ++i)
+            {
+                if (!(a[i] == b[i]) || a[i].hp != b[i].hp) { return false; }
+            }
+            return true;
+        };
+        auto sameCombos = [](const std::vector<Combo> &a, const std::vector<Combo> &b)
+        {
+            if (a.size() != b.size()) { return false; }
+            for (u64 i = 0; i < a.size(); ++i)
+            {
+                if (!std::equal(a[i].parts.begin(), a[i].parts.end(), b[i].parts.begin(),
+                                b[i].parts.end()))
+                {
+                    return false;
+                }
+            }
+            return true;
+        };
+        return gameHasEnded == other.gameHasEnded &&
+               currentPhaseIsAttack == other.currentPhaseIsAttack &&
+               numPlayers == other.numPlayers && activePlayerID == other.activePlayerID &&
+               pastYieldsInARow == other.pastYieldsInARow &&
+               player_cards == other.player_cards && drawPile == other.drawPile &&
+               discardPile == other.discardPile &&
+               sameEnemies(enemyPile, other.enemyPile) &&
+               sameCombos(usedPile, other.usedPile);
+    }
+
     void GameState::initPhaseInfo(const PhaseInfo &info)
     {
         // metadata
@@ -224,6 +412,7 @@ namespace regi
         if (info.numPlayers != totalPlayers())
         {
             status = GameStatus::ENDED;
+            rehash();
             log.endgame(INVALID_START_PLAYER_COUNT, *this);
             return;
         }
@@ -236,6 +425,7 @@ namespace regi
                       std::back_inserter(players[i].cards));
         }
         status = GameStatus::LOADING;
+        rehash();
         //
         log.startgame(*this);
     }
@@ -243,17 +433,7 @@ namespace regi
     void GameState::loadPhaseInfoForExport(PhaseInfo &info)
     {
         // metadata
-        if (status != GameStatus::ENDED) { info.gameHasEnded = 0; }
-        else
-        {
-            bool allEnemiesDead = true;
-            for (const auto &e : enemyPile)
-            {
-                allEnemiesDead = allEnemiesDead && e.hp <= 0;
-            }
-            if (allEnemiesDead) { info.gameHasEnded = 1; }
-            else { info.gameHasEnded = -1; }
-        }
+        info.gameHasEnded = endValue();
         info.activePlayerID = activePlayerID;
         info.pastYieldsInARow = pastYieldsInARow;
         info.currentPhaseIsAttack = currentPhaseIsAttack;
@@ -5,6 +5,7 @@
 #include <enemy.h>
 #include <player.h>
 #include <utils.h>
+#include <zobrist.h>
 #include <string>
 #include <sstream>
 
@@ -27,9 +28,21 @@ namespace regi
         std::vector<Card> discardPile; /* cards used up to KO enemies */
         std::vector<Combo> usedPile;   /* combos used on current enemy */
 
+        /* toBytes layout version, and the size of the largest buffer
+         * loadFromBytes accepts, from its limit on every field: 14 bytes
+         * of metadata and sizes, 4 hands of 5, 12 enemies of 2 bytes, 54
+         * draw and 54 discard cards and 64 used pile bytes. phases of
+         * real games stay far below it, under 100 bytes */
+        static constexpr u8 BYTES_VERSION = 1;
+        static constexpr u32 BYTES_MAX = 230;
+
         PhaseInfo() {};
         bool loadFromString(std::string);
         std::string toString() const;
+        bool loadFromBytes(const u8 *, u64);
+        std::string toBytes() const;
+        bool operator==(const PhaseInfo &) const;
+        std::uint64_t hash() const;
     };
 } /* namespace regi */
 #endif
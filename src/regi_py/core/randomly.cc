@@ -1,5 +1,4 @@
 #include <regi.h>
-#include <random>
 
 namespace regi
 {
@@ -14,12 +13,10 @@ namespace regi
         discardPile.clear();
         usedPile.clear();
         // starting at a random point in the game
-        std::random_device dev;
-        std::default_random_engine engine(dev());
 
         // some enemies have been killed
         i32 maxEnemies = enemyPile.size();
-        i32 killedEnemies = engine() % maxEnemies;
+        i32 killedEnemies = rng.below(maxEnemies);
         if (killedEnemies != 0)
         {
             for (i32 i = 0; i < killedEnemies; i++)
@@ -28,7 +25,7 @@ namespace regi
                 drawPile.push_back(econ);
             }
             enemyPile.erase(enemyPile.begin(), enemyPile.begin() + killedEnemies);
-            shuffle(drawPile, 0, drawPile.size());
+            shuffle(drawPile, 0, drawPile.size(), rng);
         }
         // each player may have 0 or more cards
         for (i32 i = 0; i < totalPlayers(); ++i)
@@ -36,12 +33,12 @@ namespace regi
             players[i].alive = true;
             players[i].id = i;
             players[i].cards.clear();
-            i32 psize = engine() % (handSize + 1);
+            i32 psize = rng.below(handSize + 1);
             playerDraws(players[i], psize);
         }
 
         // some cards are in the discard pile
-        i32 numCardsDiscarded = engine() % drawPile.size();
+        i32 numCardsDiscarded = rng.below(drawPile.size());
         if (numCardsDiscarded != 0)
         {
             for (i32 i = 0; i < numCardsDiscarded; i++)
@@ -49,13 +46,14 @@ namespace regi
                 discardPile.push_back(drawPile[i]);
             }
             drawPile.erase(drawPile.begin(), drawPile.begin() + numCardsDiscarded);
-            shuffle(discardPile, 0, discardPile.size());
+            shuffle(discardPile, 0, discardPile.size(), rng);
         }
 
         //
-        activePlayerID = engine() % totalPlayers();
+        activePlayerID = rng.below(totalPlayers());
         currentPhaseIsAttack = true;
         status = GameStatus::LOADING;
+        rehash();
         //
         log.startgame(*this);
     }
@@ -31,9 +31,9 @@ namespace regi
         enemyPile.push_back(Enemy(KING, DIAMONDS));
         enemyPile.push_back(Enemy(KING, HEARTS));
         enemyPile.push_back(Enemy(KING, SPADES));
-        shuffle(enemyPile, 0, 4);
-        shuffle(enemyPile, 4, 8);
-        shuffle(enemyPile, 8, 12);
+        shuffle(enemyPile, 0, 4, rng);
+        shuffle(enemyPile, 4, 8, rng);
+        shuffle(enemyPile, 8, 12, rng);
     }
 
     void GameState::initDraw()
@@ -99,7 +99,7 @@ namespace regi
             log.endgame(INVALID_START_PLAYER_COUNT, *this);
             return;
         }
-        shuffle(drawPile, 0, drawPile.size());
+        shuffle(drawPile, 0, drawPile.size(), rng);
     }
 
     void GameState::initHandSize()
@@ -137,6 +137,7 @@ namespace regi
         initPlayers();
         activePlayerID = 0;
         currentPhaseIsAttack = true;
+        rehash();
         log.startgame(*this);
     }
 
@@ -162,6 +163,36 @@ namespace regi
         status = GameStatus::RUNNING;
     }
 
+    i32 GameState::endValue() const
+    {
+        if (status != GameStatus::ENDED) { return 0; }
+        for (const auto &e : enemyPile)
+        {
+            if (e.hp > 0) { return -1; }
+        }
+        return 1;
+    }
+
+    void GameState::rehash()
+    {
+        hash.clear();
+        for (const auto &p : players) { hash.addHand(p.id, p.cards); }
+        hash.loadPiles(drawPile, enemyPile, discardPile, usedPile);
+    }
+
+    std::uint64_t GameState::phaseHash() const
+    {
+        return hash.value(endValue(), currentPhaseIsAttack, totalPlayers(),
+                          activePlayerID, pastYieldsInARow);
+    }
+
+    i32 GameState::enemyHPLeft() const
+    {
+        i32 hp = 0;
+        for (const auto &e : enemyPile) { hp += (e.hp > 0) ? e.hp : 0; }
+        return hp;
+    }
+
     i32 GameState::addPlayer(Strategy &s)
     {
         if (status != GameStatus::LOADING) { return -1; }
@@ -5,6 +5,7 @@
 #include <enemy.h>
 #include <player.h>
 #include <utils.h>
+#include <zobrist.h>
 
 namespace regi
 {
@@ -51,6 +52,8 @@ namespace regi
        private:
         BaseLog &log;
         i32 handSize;
+        i32 forcedMove; /* if >= 0, used instead of asking the strategy */
+        i32 provideForced(Combo &, const std::vector<Combo> &);
         void initHandSize();
         void initPlayers();
         void initDraw();
@@ -67,13 +70,24 @@ namespace regi
         std::vector<Enemy> enemyPile;  /* enemies still left to KO */
         std::vector<Card> discardPile; /* cards used up to KO enemies */
         std::vector<Combo> usedPile;   /* combos used on current enemy */
+        PhaseHash hash;                /* kept up to date with the piles */
+        /* mutable because strategies only see a const GameState */
+        mutable Rng rng;
 
         /* methods */
-        GameState(BaseLog &l) : log(l)
+        GameState(BaseLog &l) : log(l), rng()
         {
             status = GameStatus::LOADING;
             activePlayerID = 0;
             currentPhaseIsAttack = false;
+            forcedMove = -1;
+        };
+        GameState(BaseLog &l, std::uint64_t seed) : log(l), rng(seed)
+        {
+            status = GameStatus::LOADING;
+            activePlayerID = 0;
+            currentPhaseIsAttack = false;
+            forcedMove = -1;
         };
         i32 addPlayer(Strategy &);
         void init();
@@ -81,15 +95,25 @@ namespace regi
         void initPhaseInfo(const PhaseInfo &);
         void loadPhaseInfoForExport(PhaseInfo &);
         void setup();
+        void rehash();
+        std::uint64_t phaseHash() const;
 
         //
         bool gameRunning() const { return this->status == GameStatus::RUNNING; }
         i32 getHandSize() const { return handSize; }
+        const BaseLog &getLog() const { return log; }
         i32 totalPlayers() const { return static_cast<i32>(players.size()); }
+        i32 endValue() const;
+        i32 enemyHPLeft() const;
 
         //
         void startLoop();
         void onePhase();
+        bool yieldAllowed() const;
+        i32 pendingDamage() const;
+        bool decisionPending() const;
+        void legalMoves(std::vector<Combo> &) const;
+        bool applyMove(i32);
         void gameOver(EndGameReason);
         void postGameResult();
 
@@ -103,15 +127,15 @@ namespace regi
 
         //
         void selectAttack(Player &, bool);
-        i32 calcDamageOfCombo(Enemy &, Combo &);
+        i32 calcDamageOfCombo(const Enemy &, const Combo &) const;
         i32 calcDamage(Enemy &);
         void attackPhase(Player &, Enemy &);
         void applyAttackEffects(Player &, Enemy &);
         i32 currentEnemyDead();
 
         //
-        i32 calcBlockOfCombo(Enemy &, Combo &);
-        i32 calcBlock(Enemy &);
+        i32 calcBlockOfCombo(const Enemy &, const Combo &) const;
+        i32 calcBlock(const Enemy &) const;
         void selectDefense(Player &, int);
         void defensePhase(Player &, Enemy &);
 
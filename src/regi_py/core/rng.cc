@@ -0,0 +1,26 @@
+#include <rng.h>
+#include <random>
+
+namespace regi
+{
+    Rng::Rng()
+    {
+        std::random_device dev;
+        std::uint64_t hi = dev();
+        std::uint64_t lo = dev();
+        seed((hi << 32) | lo);
+    }
+
+    void Rng::seed(std::uint64_t x)
+    {
+        /* splitmix64 to spread the seed over the state */
+        for (i32 i = 0; i < 4; ++i)
+        {
+            x += 0x9e3779b97f4a7c15ULL;
+            std::uint64_t z = x;
+            z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+            z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+            s[i] = z ^ (z >> 31);
+        }
+    }
+} /* namespace regi */
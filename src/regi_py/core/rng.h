@@ -0,0 +1,46 @@
+#ifndef RNG_H
+#define RNG_H
+#include <card.h>
+#include <cstdint>
+
+namespace regi
+{
+    /* xoshiro256** (Blackman & Vigna), seeded through splitmix64.
+     * cheap to copy and to step, so every GameState owns one */
+    struct Rng
+    {
+       private:
+        std::uint64_t s[4];
+        static std::uint64_t rotl(std::uint64_t x, i32 k)
+        {
+            return (x << k) | (x >> (64 - k));
+        }
+
+       public:
+        Rng();
+        explicit Rng(std::uint64_t seed) { this->seed(seed); };
+        void seed(std::uint64_t);
+        std::uint64_t next()
+        {
+            const std::uint64_t result = rotl(s[1] * 5, 7) * 9;
+            const std::uint64_t t = s[1] << 17;
+            s[2] ^= s[0];
+            s[3] ^= s[1];
+            s[1] ^= s[2];
+            s[0] ^= s[3];
+            s[2] ^= t;
+            s[3] = rotl(s[3], 45);
+            return result;
+        }
+        /* uniform in [0, n), n > 0 */
+        u32 below(u32 n)
+        {
+            return static_cast<u32>(((next() >> 32) * static_cast<std::uint64_t>(n)) >>
+                                    32);
+        }
+        /* uniform in [0, 1) */
+        double uniform() { return static_cast<double>(next() >> 11) * 0x1.0p-53; }
+    };
+} /* namespace regi */
+
+#endif
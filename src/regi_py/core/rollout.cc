@@ -0,0 +1,439 @@
+#include <rollout.h>
+#include <dfsel.h>
+#include <array>
+
+namespace regi
+{
+    static std::uint64_t bit(u32 loc) { return std::uint64_t(1) << loc; }
+
+    static const Card &cardAt(u32 loc)
+    {
+        static const auto cards = []()
+        {
+            std::array<Card, MAX_CARDS_IN_GAME> t;
+            for (i32 loc = 1; loc < MAX_CARDS_IN_GAME; ++loc) { t[loc].fromLocation(loc); }
+            return t;
+        }();
+        return cards[loc];
+    }
+
+    static u32 handCards(std::uint64_t hand, Card *cards, u8 *locs)
+    {
+        // ascending locations are already in sorted card order
+        u32 n = 0;
+        for (std::uint64_t m = hand; m != 0 && n < MAX_COMBO_CARDS; m &= (m - 1))
+        {
+            locs[n] = __builtin_ctzll(m);
+            cards[n] = cardAt(locs[n]);
+            n++;
+        }
+        return n;
+    }
+
+    static std::uint64_t playedCards(u32 mask, const u8 *locs)
+    {
+        std::uint64_t played = 0;
+        for (u32 m = mask; m != 0; m &= (m - 1)) { played |= bit(locs[__builtin_ctz(m)]); }
+        return played;
+    }
+
+    bool rolloutPolicyByName(const std::string &name, RolloutPolicy &policy)
+    {
+        if (name == "random") { policy = ROLLOUT_RANDOM; }
+        else if (name == "damage") { policy = ROLLOUT_DAMAGE; }
+        else if (name == "sub-random") { policy = ROLLOUT_SUBSET; }
+        else { return false; }
+        return true;
+    }
+
+    Rollout::Rollout()
+        : status(GameStatus::LOADING),
+          reason(NO_ENEMIES),
+          currentPhaseIsAttack(false),
+          numPlayers(0),
+          handSize(0),
+          activePlayerID(0),
+          pastYieldsInARow(0),
+          phaseCount(0),
+          discardPile(0),
+          usedCards(0),
+          usedJoker(false),
+          usedBlock(0),
+          drawHead(0),
+          drawCount(0),
+          enemyHead(0),
+          enemyCount(0),
+          rng(0)
+    {
+        for (i32 i = 0; i < MAX_PLAYERS; ++i) { hands[i] = 0; }
+    }
+
+    bool Rollout::load(const PhaseInfo &info)
+    {
+        /* returns false for anything GameState::setup would reject,
+         * or that does not fit here. those are left to GameState */
+        i32 tp = info.numPlayers;
+        if (tp < 2 || tp > MAX_PLAYERS) { return false; }
+        if (static_cast<i32>(info.player_cards.size()) != tp) { return false; }
+        if (info.activePlayerID < 0 || info.activePlayerID >= tp) { return false; }
+        if (info.enemyPile.size() > MAX_ENEMIES) { return false; }
+
+        std::uint64_t seen = 0;
+        i32 jokers = 0;
+        auto locate = [&](const Card &c) -> i32
+        {
+            i32 loc = c.toLocation();
+            if (loc == 1) { loc += jokers++; }
+            if (loc < 1 || loc >= MAX_CARDS_IN_GAME || jokers > 2) { return -1; }
+            if ((seen & bit(loc)) != 0) { return -1; }
+            seen |= bit(loc);
+            return loc;
+        };
+
+        numPlayers = tp;
+        handSize = (tp == 2) ? 7 : (tp == 3) ? 6 : 5;
+        for (i32 i = 0; i < MAX_PLAYERS; ++i) { hands[i] = 0; }
+        for (i32 i = 0; i < tp; ++i)
+        {
+            if (static_cast<i32>(info.player_cards[i].size()) > handSize) { return false; }
+            for (const auto &c : info.player_cards[i])
+            {
+                i32 loc = locate(c);
+                if (loc < 0) { return false; }
+                hands[i] |= bit(loc);
+            }
+        }
+
+        drawHead = 0;
+        drawCount = 0;
+        for (const auto &c : info.drawPile)
+        {
+            i32 loc = locate(c);
+            if (loc < 0) { return false; }
+            drawPile[drawCount++] = loc;
+        }
+
+        discardPile = 0;
+        for (const auto &c : info.discardPile)
+        {
+            i32 loc = locate(c);
+            if (loc < 0) { return false; }
+            discardPile |= bit(loc);
+        }
+
+        usedCards = 0;
+        usedJoker = false;
+        usedBlock = 0;
+        for (const auto &combo : info.usedPile)
+        {
+            i32 base = 0;
+            u32 powers = 0;
+            for (const auto &c : combo.parts)
+            {
+                i32 loc = locate(c);
+                if (loc < 0) { return false; }
+                usedCards |= bit(loc);
+                base += c.strength();
+                powers |= getPower(c);
+            }
+            if ((powers & JOKER_NERF) != 0) { usedJoker = true; }
+            if ((powers & SPADES_BLOCK) != 0) { usedBlock += base; }
+        }
+
+        enemyHead = 0;
+        enemyCount = 0;
+        for (const auto &e : info.enemyPile)
+        {
+            if (locate(e) < 0) { return false; }
+            enemyPile[enemyCount++] = e;
+        }
+
+        currentPhaseIsAttack = info.currentPhaseIsAttack;
+        activePlayerID = info.activePlayerID;
+        pastYieldsInARow = info.pastYieldsInARow;
+        phaseCount = 0;
+        status = GameStatus::RUNNING;
+        return true;
+    }
+
+    void Rollout::play(RolloutPolicy policy)
+    {
+        while (status == GameStatus::RUNNING) { onePhase(policy); }
+    }
+
+    void Rollout::onePhase(RolloutPolicy policy)
+    {
+        if (enemyCount == 0)
+        {
+            gameOver(NO_ENEMIES);
+            return;
+        }
+        Enemy &enemy = enemyPile[enemyHead];
+        if (currentPhaseIsAttack)
+        {
+            i32 curID = activePlayerID;
+            attackPhase(policy, enemy);
+            if (status != GameStatus::RUNNING) { return; }
+            if (curID != activePlayerID) { return; }
+            // attack ended, defend if enemy still alive
+            currentPhaseIsAttack = currentEnemyDead();
+        }
+        else
+        {
+            defensePhase(policy, enemy);
+            if (status == GameStatus::RUNNING)
+            {
+                activePlayerID = (activePlayerID + 1) % numPlayers;
+                currentPhaseIsAttack = true;
+            }
+        }
+    }
+
+    void Rollout::gameOver(EndGameReason e)
+    {
+        status = GameStatus::ENDED;
+        reason = e;
+    }
+
+    i32 Rollout::comboDamage(const Enemy &enemy, i32 base, u32 powers) const
+    {
+        u32 epow = usedJoker ? 0 : (getPower(enemy) & CLUBS_DOUBLE);
+        bool dbl = ((powers & CLUBS_DOUBLE) & (~epow)) != 0;
+        return dbl ? 2 * base : base;
+    }
+
+    i32 Rollout::currentBlock(const Enemy &enemy) const
+    {
+        /* STAB: enemy is a spade, and no joker was played */
+        if (!usedJoker && (getPower(enemy) & SPADES_BLOCK) != 0) { return 0; }
+        return usedBlock;
+    }
+
+    void Rollout::attackPhase(RolloutPolicy policy, Enemy &enemy)
+    {
+        phaseCount += 1;
+        Card cards[MAX_COMBO_CARDS];
+        u8 locs[MAX_COMBO_CARDS];
+        HandTable table(cards, handCards(hands[activePlayerID], cards, locs));
+
+        // same combos in the same order as collectAttacks, 0 is a yield
+        u8 masks[1u << MAX_COMBO_CARDS];
+        u32 count = 0;
+        if (pastYieldsInARow < (numPlayers - 1)) { masks[count++] = 0; }
+        count += table.validAttacks(masks + count);
+        if (count == 0)
+        {
+            gameOver(ATTACK_FAILED);
+            return;
+        }
+
+        u32 pick = 0;
+        if (policy == ROLLOUT_RANDOM) { pick = rng.below(count); }
+        else if (policy == ROLLOUT_SUBSET)
+        {
+            u32 sizes[1u << MAX_COMBO_CARDS];
+            u32 kept[1u << MAX_COMBO_CARDS];
+            for (u32 i = 0; i < count; ++i) { sizes[i] = __builtin_popcount(masks[i]); }
+            u32 k = nonbadAttacks(sizes, count, rng, kept);
+            pick = kept[rng.below(k)];
+        }
+        else
+        {
+            // as DamageStrategy: highest damage if cannot kill, else lowest kill
+            i32 dmg = -1;
+            for (u32 i = 0; i < count; ++i)
+            {
+                i32 base = 0;
+                u32 powers = 0;
+                for (u32 m = masks[i]; m != 0; m &= (m - 1))
+                {
+                    base += table.cardStrength[__builtin_ctz(m)];
+                    powers |= table.cardPower[__builtin_ctz(m)];
+                }
+                i32 tempDmg = comboDamage(enemy, base, powers);
+                bool better;
+                if (i == 0) { better = true; }
+                else if (tempDmg >= enemy.hp) { better = (dmg < enemy.hp) || (dmg > tempDmg); }
+                else { better = tempDmg > dmg; }
+                if (better)
+                {
+                    dmg = tempDmg;
+                    pick = i;
+                }
+            }
+        }
+
+        u32 mask = masks[pick];
+        i32 base = 0;
+        u32 powers = 0;
+        for (u32 m = mask; m != 0; m &= (m - 1))
+        {
+            base += table.cardStrength[__builtin_ctz(m)];
+            powers |= table.cardPower[__builtin_ctz(m)];
+        }
+        std::uint64_t played = playedCards(mask, locs);
+        hands[activePlayerID] &= ~played;
+        usedCards |= played;
+        if ((powers & JOKER_NERF) != 0) { usedJoker = true; }
+        if ((powers & SPADES_BLOCK) != 0) { usedBlock += base; }
+        pastYieldsInARow = (mask == 0) ? (pastYieldsInARow + 1) : 0;
+
+        enemy.hp -= comboDamage(enemy, base, powers);
+
+        // suit powers, unless the enemy is immune
+        u32 epow = usedJoker ? 0 : getPower(enemy);
+        u32 cpow = powers & (~epow);
+        if ((cpow & HEARTS_REPLENISH) != 0) { refreshDiscards(base); }
+        if ((cpow & DIAMONDS_DRAW) != 0) { refreshDraws(activePlayerID, base); }
+        if ((cpow & JOKER_NERF) != 0) { redirect(); }
+    }
+
+    void Rollout::defensePhase(RolloutPolicy policy, Enemy &enemy)
+    {
+        phaseCount += 1;
+        i32 damage = enemy.strength() - currentBlock(enemy);
+        if (damage <= 0) { return; }
+
+        Card cards[MAX_COMBO_CARDS];
+        u8 locs[MAX_COMBO_CARDS];
+        HandTable table(cards, handCards(hands[activePlayerID], cards, locs));
+        table.loadStrengths();
+
+        // same combos in the same order as collectDefenses
+        u8 masks[1u << MAX_COMBO_CARDS];
+        u32 count = 0;
+        for (u32 mask : subsetsOfSize(table.n))
+        {
+            if (table.strengths[mask] >= damage) { masks[count++] = mask; }
+        }
+        if (count == 0)
+        {
+            /* impossible to block the damage, so game over */
+            gameOver(BLOCK_FAILED);
+            return;
+        }
+
+        u32 pick = 0;
+        if (policy == ROLLOUT_RANDOM) { pick = rng.below(count); }
+        else if (policy == ROLLOUT_SUBSET)
+        {
+            u32 sizes[1u << MAX_COMBO_CARDS];
+            i32 blocks[1u << MAX_COMBO_CARDS];
+            u32 kept[1u << MAX_COMBO_CARDS];
+            for (u32 i = 0; i < count; ++i)
+            {
+                sizes[i] = __builtin_popcount(masks[i]);
+                blocks[i] = table.strengths[masks[i]];
+            }
+            u32 k = nonbadDefenses(sizes, blocks, count, rng, kept);
+            pick = kept[rng.below(k)];
+        }
+        else
+        {
+            // as DamageStrategy: lowest block that works
+            for (u32 i = 1; i < count; ++i)
+            {
+                if (table.strengths[masks[i]] < table.strengths[masks[pick]]) { pick = i; }
+            }
+        }
+
+        std::uint64_t played = playedCards(masks[pick], locs);
+        hands[activePlayerID] &= ~played;
+        discardPile |= played;
+    }
+
+    bool Rollout::currentEnemyDead()
+    {
+        Enemy &enemy = enemyPile[enemyHead];
+        if (enemy.hp > 0) { return false; }
+        u32 loc = enemy.toLocation();
+        if (enemy.hp == 0)
+        {
+            /* exact kill, so add to top of draw pile */
+            drawHead = (drawHead + DRAW_CAPACITY - 1) % DRAW_CAPACITY;
+            drawPile[drawHead] = loc;
+            drawCount += 1;
+        }
+        else { discardPile |= bit(loc); }
+        enemyHead += 1;
+        enemyCount -= 1;
+        discardPile |= usedCards;
+        usedCards = 0;
+        usedJoker = false;
+        usedBlock = 0;
+        return true;
+    }
+
+    void Rollout::drawOne(i32 playerID)
+    {
+        std::uint64_t &hand = hands[playerID];
+        if (drawCount == 0 || __builtin_popcountll(hand) >= handSize) { return; }
+        hand |= bit(drawPile[drawHead]);
+        drawHead = (drawHead + 1) % DRAW_CAPACITY;
+        drawCount -= 1;
+    }
+
+    void Rollout::refreshDiscards(i32 n)
+    {
+        /* taking random cards one at a time is the same
+         * as shuffling the discards and taking from the back */
+        for (; n > 0 && discardPile != 0; n--)
+        {
+            u32 k = rng.below(__builtin_popcountll(discardPile));
+            std::uint64_t m = discardPile;
+            for (; k > 0; k--) { m &= (m - 1); }
+            u32 loc = __builtin_ctzll(m);
+            discardPile &= ~bit(loc);
+            drawPile[(drawHead + drawCount) % DRAW_CAPACITY] = loc;
+            drawCount += 1;
+        }
+    }
+
+    void Rollout::refreshDraws(i32 ip, i32 n)
+    {
+        bool full[MAX_PLAYERS] = {false, false, false, false};
+        i32 fullct = 0;
+        for (i32 i = ip % numPlayers; n > 0; n--)
+        {
+            drawOne(i);
+            if (!full[i] && __builtin_popcountll(hands[i]) == handSize)
+            {
+                full[i] = true;
+                fullct += 1;
+            }
+            i = (i + 1) % numPlayers;
+            // if all players are full, stop draw
+            if (fullct == numPlayers) { break; }
+        }
+    }
+
+    void Rollout::redirect()
+    {
+        /* both native strategies pick another player at random */
+        i32 offset = 1 + rng.below(numPlayers - 1);
+        activePlayerID = (activePlayerID + offset) % numPlayers;
+        currentPhaseIsAttack = true;
+    }
+
+    i32 Rollout::endValue() const
+    {
+        if (status != GameStatus::ENDED) { return 0; }
+        for (i32 i = 0; i < enemyCount; ++i)
+        {
+            if (enemyPile[enemyHead + i].hp > 0) { return -1; }
+        }
+        return 1;
+    }
+
+    i32 Rollout::enemyHPLeft() const
+    {
+        i32 hp = 0;
+        for (i32 i = 0; i < enemyCount; ++i)
+        {
+            const Enemy &e = enemyPile[enemyHead + i];
+            hp += (e.hp > 0) ? e.hp : 0;
+        }
+        return hp;
+    }
+
+} /* namespace regi */
@@ -0,0 +1,79 @@
+#ifndef ROLLOUT_H
+#define ROLLOUT_H
+#include <card.h>
+#include <enemy.h>
+#include <phaseinfo.h>
+#include <regi.h>
+#include <rng.h>
+#include <cstdint>
+#include <string>
+
+namespace regi
+{
+    /* native strategies that a Rollout can play without a Strategy object */
+    enum RolloutPolicy
+    {
+        ROLLOUT_RANDOM,
+        ROLLOUT_DAMAGE,
+        ROLLOUT_SUBSET /* as SubsetRandomStrategy */
+    };
+
+    bool rolloutPolicyByName(const std::string &, RolloutPolicy &);
+
+    /* compact copy of a game, only for playing it out quickly.
+     * follows the same rules as GameState::onePhase, but moves are
+     * chosen by a RolloutPolicy and nothing is logged.
+     *
+     * every card is a bit of its location (see Card::toLocation),
+     * with the two jokers at locations 1 and 2. hands, the discard
+     * pile and the cards used on the current enemy are bitmasks,
+     * the draw pile is a ring buffer because its order matters. */
+    struct Rollout
+    {
+        static constexpr i32 MAX_PLAYERS = 4;
+        static constexpr i32 MAX_ENEMIES = 12;
+        static constexpr u32 DRAW_CAPACITY = 64;
+
+        GameStatus status;
+        EndGameReason reason;
+        bool currentPhaseIsAttack;
+        i32 numPlayers;
+        i32 handSize;
+        i32 activePlayerID;
+        i32 pastYieldsInARow;
+        i32 phaseCount;
+        std::uint64_t hands[MAX_PLAYERS];
+        std::uint64_t discardPile;
+        std::uint64_t usedCards; /* cards played on the current enemy */
+        bool usedJoker;          /* has the current enemy been nerfed? */
+        i32 usedBlock;           /* spade block against the current enemy */
+        u8 drawPile[DRAW_CAPACITY];
+        u32 drawHead;
+        u32 drawCount;
+        Enemy enemyPile[MAX_ENEMIES];
+        i32 enemyHead;
+        i32 enemyCount;
+        Rng rng;
+
+        Rollout();
+        bool load(const PhaseInfo &);
+        void play(RolloutPolicy);
+        void onePhase(RolloutPolicy);
+        i32 endValue() const;
+        i32 enemyHPLeft() const;
+
+       private:
+        void gameOver(EndGameReason);
+        void attackPhase(RolloutPolicy, Enemy &);
+        void defensePhase(RolloutPolicy, Enemy &);
+        bool currentEnemyDead();
+        i32 comboDamage(const Enemy &, i32, u32) const;
+        i32 currentBlock(const Enemy &) const;
+        void drawOne(i32);
+        void refreshDiscards(i32);
+        void refreshDraws(i32, i32);
+        void redirect();
+    };
+} /* namespace regi */
+
+#endif
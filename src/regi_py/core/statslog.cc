@@ -0,0 +1,37 @@
+#include <statslog.h>
+
+namespace regi
+{
+    void StatsLog::reset()
+    {
+        startHP = 0;
+        endHP = 0;
+        phaseCount = 0;
+        kills = 0;
+        exactKills = 0;
+        ended = false;
+        reason = INVALID_START_PLAYER_SETUP;
+    }
+
+    void StatsLog::enemyKill(const Enemy &enemy, const GameState &g)
+    {
+        (void)g;
+        kills += 1;
+        if (enemy.hp == 0) { exactKills += 1; }
+    }
+
+    void StatsLog::startgame(const GameState &g)
+    {
+        reset();
+        startHP = g.enemyHPLeft();
+        endHP = startHP;
+    }
+
+    void StatsLog::endgame(EndGameReason e, const GameState &g)
+    {
+        ended = true;
+        reason = e;
+        endHP = g.enemyHPLeft();
+        phaseCount = g.phaseCount;
+    }
+} /* namespace regi */
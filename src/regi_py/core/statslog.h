@@ -0,0 +1,48 @@
+#ifndef STATSLOG_H
+#define STATSLOG_H
+#include <regi.h>
+
+namespace regi
+{
+    /* ignores every event, so a game can run without any logging cost */
+    class NullLog : public BaseLog
+    {
+       public:
+        void attack(const Player &, const Enemy &, const Combo &, const i32,
+                    const GameState &) {};
+        void enemyKill(const Enemy &, const GameState &) {};
+        void defend(const Player &, const Combo &, const i32, const GameState &) {};
+        void redirect(const Player &, const i32, const GameState &) {};
+        void failBlock(const Player &, const i32, const i32, const GameState &) {};
+        void fullBlock(const Player &, const i32, const i32, const GameState &) {};
+        void drawOne(const Player &) {};
+        void cannotDrawDeckEmpty(const Player &, const GameState &) {};
+        void replenish(const i32) {};
+        void state(const GameState &) {};
+        void debug(const GameState &) {};
+        void startgame(const GameState &) {};
+        void endgame(EndGameReason, const GameState &) {};
+        void postgame(const GameState &) {};
+    };
+
+    /* keeps a few counters about the game, reset on every startgame */
+    class StatsLog : public NullLog
+    {
+       public:
+        i32 startHP;
+        i32 endHP;
+        i32 phaseCount;
+        i32 kills;
+        i32 exactKills;
+        bool ended;
+        EndGameReason reason;
+
+        StatsLog() { reset(); };
+        void reset();
+        void enemyKill(const Enemy &, const GameState &);
+        void startgame(const GameState &);
+        void endgame(EndGameReason, const GameState &);
+    };
+} /* namespace regi */
+
+#endif
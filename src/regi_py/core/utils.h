@@ -2,8 +2,8 @@
 #define UTILS_H
 #include <cstdint>
 #include <vector>
-#include <random>
 #include <combo.h>
+#include <rng.h>
 
 template <typename T>
 std::ostream &operator<<(std::ostream &os, const std::vector<T> pile)
@@ -14,16 +14,14 @@ std::ostream &operator<<(std::ostream &os, const std::vector<T> pile)
 }
 
 template <typename T>
-void shuffle(std::vector<T> &pile, u32 start, u32 end)
+void shuffle(std::vector<T> &pile, u32 start, u32 end, regi::Rng &rng)
 {
     if (end <= 1 || end <= start) { return; }
     i32 i, j;
     i32 len = end - start;
-    std::random_device dev;
-    std::default_random_engine engine(dev());
     for (i = 0; i < len - 1; ++i)
     {
-        j = i + (engine() % (len - i));
+        j = i + rng.below(len - i);
         std::swap(pile[start + i], pile[start + j]);
     }
 }
@@ -0,0 +1,51 @@
+#include <zobrist.h>
+
+namespace regi
+{
+    void PhaseHash::clear()
+    {
+        hands = 0;
+        draw.clear();
+        enemies.clear();
+        discard.clear();
+        used.clear();
+    }
+
+    void PhaseHash::addHand(i32 player, const std::vector<Card> &cards)
+    {
+        for (const Card &c : cards) { hands += handKey(c, player); }
+    }
+
+    void PhaseHash::loadPiles(const std::vector<Card> &drawPile,
+                              const std::vector<Enemy> &enemyPile,
+                              const std::vector<Card> &discardPile,
+                              const std::vector<Combo> &usedPile)
+    {
+        draw.clear();
+        for (const Card &c : drawPile) { draw.pushBack(drawKey(c)); }
+        enemies.clear();
+        for (const Enemy &e : enemyPile) { enemies.pushBack(enemyKey(e)); }
+        discard.clear();
+        for (const Card &c : discardPile) { discard.pushBack(discardKey(c)); }
+        used.clear();
+        for (const Combo &combo : usedPile) { used.pushBack(comboKey(combo)); }
+    }
+
+    std::uint64_t PhaseHash::value(i32 gameHasEnded, bool currentPhaseIsAttack,
+                                   i32 numPlayers, i32 activePlayerID,
+                                   i32 pastYieldsInARow) const
+    {
+        std::uint64_t meta = static_cast<std::uint64_t>(gameHasEnded + 1);
+        meta |= static_cast<std::uint64_t>(currentPhaseIsAttack) << 4;
+        meta |= static_cast<std::uint64_t>(numPlayers & 0xff) << 8;
+        meta |= static_cast<std::uint64_t>(activePlayerID & 0xff) << 16;
+        meta |= static_cast<std::uint64_t>(pastYieldsInARow & 0xff) << 24;
+        std::uint64_t h = ZobristKeys::mix(meta);
+        h = ZobristKeys::mix(h + hands);
+        h = ZobristKeys::mix(h + draw.sum);
+        h = ZobristKeys::mix(h + enemies.sum);
+        h = ZobristKeys::mix(h + discard.sum);
+        h = ZobristKeys::mix(h + used.sum);
+        return h;
+    }
+} /* namespace regi */
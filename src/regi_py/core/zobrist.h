@@ -0,0 +1,155 @@
+#ifndef ZOBRIST_H
+#define ZOBRIST_H
+#include <card.h>
+#include <combo.h>
+#include <enemy.h>
+#include <cstdint>
+#include <vector>
+
+namespace regi
+{
+    /* inverse of an odd number mod 2^64, by Newton's iteration */
+    constexpr std::uint64_t inverseOf(std::uint64_t a)
+    {
+        std::uint64_t x = a; /* correct to 3 bits since a is odd */
+        for (i32 i = 0; i < 5; ++i) { x *= 2 - a * x; }
+        return x;
+    }
+
+    /* random keys for every (card, pile) pair and every enemy hp,
+     * made with splitmix64 when compiling */
+    struct ZobristKeys
+    {
+        static constexpr i32 PILES = 8; /* hands of players 0-3, then the piles */
+        static constexpr i32 DRAW = 4;
+        static constexpr i32 ENEMY = 5;
+        static constexpr i32 DISCARD = 6;
+        static constexpr i32 USED = 7;
+        static constexpr i32 HP_OFFSET = 512; /* hp is well within +-512 */
+
+        std::uint64_t cards[70 * PILES];
+        std::uint64_t hp[2 * HP_OFFSET];
+        std::uint64_t combo;
+
+        static constexpr std::uint64_t mix(std::uint64_t z)
+        {
+            z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+            z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+            return z ^ (z >> 31);
+        }
+
+        constexpr ZobristKeys() : cards(), hp(), combo(0)
+        {
+            std::uint64_t x = 0x5851f42d4c957f2dULL;
+            for (i32 i = 0; i < 70 * PILES; ++i)
+            {
+                x += 0x9e3779b97f4a7c15ULL;
+                cards[i] = mix(x);
+            }
+            for (i32 i = 0; i < 2 * HP_OFFSET; ++i)
+            {
+                x += 0x9e3779b97f4a7c15ULL;
+                hp[i] = mix(x);
+            }
+            x += 0x9e3779b97f4a7c15ULL;
+            combo = mix(x);
+        }
+    };
+
+    inline constexpr ZobristKeys ZOBRIST_KEYS{};
+
+    /* Zobrist-style hash of everything a PhaseInfo holds.
+     *
+     * every (card, pile) pair has a random 64-bit key. hands are
+     * unordered, so a hand contributes the sum of its keys. the other
+     * piles are ordered, so a pile contributes sum(key * MUL^position),
+     * which can be kept up to date when cards enter or leave at either
+     * end of the pile. GameState updates these sums as the game moves,
+     * PhaseInfo::hash computes them from scratch, and both give the
+     * same value for the same phase. */
+    struct PhaseHash
+    {
+        static constexpr std::uint64_t MUL = 0x9e3779b97f4a7c15ULL;
+        static constexpr std::uint64_t INV = inverseOf(MUL);
+
+        struct Pile
+        {
+            std::uint64_t sum;
+            std::uint64_t top; /* MUL^size */
+            Pile() : sum(0), top(1) {};
+            void clear()
+            {
+                sum = 0;
+                top = 1;
+            }
+            void pushBack(std::uint64_t key)
+            {
+                sum += key * top;
+                top *= MUL;
+            }
+            void popBack(std::uint64_t key)
+            {
+                top *= INV;
+                sum -= key * top;
+            }
+            void pushFront(std::uint64_t key)
+            {
+                sum = sum * MUL + key;
+                top *= MUL;
+            }
+            void popFront(std::uint64_t key)
+            {
+                sum = (sum - key) * INV;
+                top *= INV;
+            }
+            void replaceFront(std::uint64_t oldKey, std::uint64_t newKey)
+            {
+                sum += newKey - oldKey;
+            }
+        };
+
+        std::uint64_t hands;
+        Pile draw;
+        Pile enemies;
+        Pile discard;
+        Pile used;
+
+        PhaseHash() : hands(0) {};
+        void clear();
+        void addHand(i32, const std::vector<Card> &);
+        void loadPiles(const std::vector<Card> &, const std::vector<Enemy> &,
+                       const std::vector<Card> &, const std::vector<Combo> &);
+        std::uint64_t value(i32, bool, i32, i32, i32) const;
+
+        static std::uint64_t cardKey(const Card &c, i32 pile)
+        {
+            return ZOBRIST_KEYS.cards[c.toIndex() * ZobristKeys::PILES + pile];
+        }
+        static std::uint64_t handKey(const Card &c, i32 player)
+        {
+            return cardKey(c, player);
+        }
+        static std::uint64_t drawKey(const Card &c)
+        {
+            return cardKey(c, ZobristKeys::DRAW);
+        }
+        static std::uint64_t discardKey(const Card &c)
+        {
+            return cardKey(c, ZobristKeys::DISCARD);
+        }
+        static std::uint64_t enemyKey(const Enemy &e)
+        {
+            i32 hp = (e.hp + ZobristKeys::HP_OFFSET) & (2 * ZobristKeys::HP_OFFSET - 1);
+            return cardKey(e, ZobristKeys::ENEMY) + ZOBRIST_KEYS.hp[hp];
+        }
+        static std::uint64_t comboKey(const Combo &combo)
+        {
+            /* a yield is an empty combo, so it gets only the base key */
+            std::uint64_t key = ZOBRIST_KEYS.combo;
+            for (const Card &c : combo.parts) { key += cardKey(c, ZobristKeys::USED); }
+            return key;
+        }
+    };
+} /* namespace regi */
+
+#endif
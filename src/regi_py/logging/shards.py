@@ -0,0 +1,133 @@
+from regi_py.core import Card, PhaseInfo, LocationInfo, MAX_CARDS_IN_GAME
+
+#
+import os
+import glob
+import numpy as np
+
+# numpy and core only, no torch, so machines that collect self-play
+# data can write shards without it
+
+
+class LocationCheck:
+
+    CARD_STRINGS = ["yield"] + [
+        str(Card.from_location(i)) for i in range(1, MAX_CARDS_IN_GAME)
+    ]
+
+    @classmethod
+    def get_locs_in_combo(cls, locs, combo_str):
+        res = set()
+        for loc in locs:
+            if cls.CARD_STRINGS[loc] in combo_str:
+                res.add(loc)
+        if len(res) == 0 or "yield" in combo_str:
+            res.add(0)
+        return res
+
+
+def get_keepyness(hand_locs, info):
+    arr = np.zeros(MAX_CARDS_IN_GAME, dtype=np.float32)
+    if len(info.N1) != 0:
+        played_locs = LocationCheck.get_locs_in_combo(
+            hand_locs, info.combos[info.sel_index]
+        )
+        kept_locs = hand_locs - played_locs
+    else:
+        kept_locs = hand_locs
+    for ind in kept_locs:
+        arr[ind] = 1
+    return arr
+
+
+def encode_infos(infos):
+    # arrays for a batch of MCTSNodeInfo: x (B, 55, 9), y (B, 55),
+    # value (B, 1) and attack (B,)
+    phases = [PhaseInfo.from_string(info.phase) for info in infos]
+    # xs is B, 55, 9, filled in one call
+    xs = LocationInfo.batch_from_active(phases)
+    ys = np.zeros((len(infos), MAX_CARDS_IN_GAME), dtype=np.float32)
+    for k, (info, x) in enumerate(zip(infos, xs)):
+        cards_before = set(int(l) for l in x[:, 1].nonzero()[0])
+        cards_before.add(0)  # yield
+        ys[k] = get_keepyness(cards_before, info)
+    values = np.array([info.value for info in infos], dtype=np.float32)
+    attack = np.array([p.phase_attacking for p in phases], dtype=np.int64)
+    return xs, ys, values.reshape(-1, 1), attack
+
+
+# every shard is a folder of .npy files, one row per MCTSNodeInfo:
+#   x (N, 55, 9) float32 location tensors from LocationInfo.from_active
+#   y (N, 55) float32 keep-ness targets
+#   value (N, 1) float32, attack (N,) int64
+#   visits (N,) int64 and sel_index (N,) int64 of the search
+#   policy: the visit counts of every row, concatenated, with row k at
+#   policy[policy_offsets[k] : policy_offsets[k + 1]]
+SHARD_FIELDS = (
+    "x",
+    "y",
+    "value",
+    "attack",
+    "visits",
+    "sel_index",
+    "policy",
+    "policy_offsets",
+)
+
+
+class ShardWriter:
+    # writes MCTSNodeInfo records as shards of shard_size rows each,
+    # named {prefix}-00000, {prefix}-00001, ... inside folder
+    def __init__(self, folder, prefix, shard_size=4096):
+        self.folder = folder
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.pending = []
+        self.num_shards = 0
+
+    def add_game(self, infos):
+        self.pending.extend(infos)
+        while len(self.pending) >= self.shard_size:
+            self.write_shard(self.pending[: self.shard_size])
+            self.pending = self.pending[self.shard_size :]
+
+    def write_shard(self, infos):
+        xs, ys, values, attack = encode_infos(infos)
+        counts = [np.asarray(info.N1, dtype=np.int64) for info in infos]
+        offsets = np.zeros(len(infos) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(c) for c in counts])
+        columns = {
+            "x": xs,
+            "y": ys,
+            "value": values,
+            "attack": attack,
+            "visits": np.array([info.N0 for info in infos], dtype=np.int64),
+            "sel_index": np.array([info.sel_index for info in infos], dtype=np.int64),
+            "policy": np.concatenate(counts + [np.zeros(0, dtype=np.int64)]),
+            "policy_offsets": offsets,
+        }
+        path = os.path.join(self.folder, f"{self.prefix}-{self.num_shards:05d}")
+        # written to a temporary name first, so readers never see half a shard
+        tmp = path + ".tmp"
+        os.makedirs(tmp, exist_ok=False)
+        for name in SHARD_FIELDS:
+            np.save(os.path.join(tmp, f"{name}.npy"), columns[name])
+        os.rename(tmp, path)
+        self.num_shards += 1
+
+    def close(self):
+        if len(self.pending) != 0:
+            self.write_shard(self.pending)
+            self.pending = []
+
+
+def find_shards(folder):
+    paths = [os.path.dirname(p) for p in glob.glob(os.path.join(folder, "*", "x.npy"))]
+    return sorted(p for p in paths if not p.endswith(".tmp"))
+
+
+def load_shard(path, mmap_mode="r"):
+    return {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in SHARD_FIELDS
+    }
@@ -1,6 +1,8 @@
 from .utils import MemoryLog
 from .basicnet import BasicNet
 from .keepy_explorer import PUCTExplorerStrategy, NetDirectStrategy, KeepyPUCTNode
-from .loaders import PUCTDataset, PUCTDataLoader
+from .loaders import PUCTDataset, PUCTDataLoader, ReplayBuffer, ShardDataset
+from regi_py.logging.shards import ShardWriter
+from .inference import RemoteNet, serve
 
 STRATEGY_LIST = []
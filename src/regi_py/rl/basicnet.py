@@ -1,6 +1,5 @@
 from regi_py.core import PhaseInfo
 from regi_py.core import LocationInfo
-from regi_py.strats.mcts_explorer import MCTSNodeInfo
 from regi_py.rl.utils import *
 from regi_py.rl.subnets import LinearBlock
 
@@ -36,38 +35,46 @@ class BasicNet(nn.Module):
         y3 = self.ac1(y2.reshape(y2.shape[0], -1))
         return y3, v1
 
-    def calculate_loss(self, y, v, y_hat, v_hat):
-        loss1 = nn.functional.mse_loss(y_hat * y, y)
-        loss2 = nn.functional.mse_loss(v_hat, v)
-        return loss1 + loss2
+    def calculate_loss(self, y, v, y_hat, v_hat, weight=None):
+        if weight is None:
+            loss1 = nn.functional.mse_loss(y_hat * y, y)
+            loss2 = nn.functional.mse_loss(v_hat, v)
+            return loss1 + loss2
+        # weight (B, 1) scales the loss of every row, the means match the
+        # unweighted loss when all weights are 1
+        loss1 = ((y_hat * y - y) ** 2).mean(dim=1, keepdim=True)
+        loss2 = ((v_hat - v) ** 2).mean(dim=1, keepdim=True)
+        return (weight * (loss1 + loss2)).mean()
 
     def predict(self, obj):
-        info = MCTSNodeInfo(phase=str(obj), N0=0, value=0, N1=[], combos=[], sel_index=-1, offset=0)
-        data = self.tensorify([info])
-        y_hat0, v_hat0 = self.forward(data[0])
-        y_hat = y_hat0.detach().cpu().numpy()[0]
-        v_hat = v_hat0.detach().cpu().numpy()[0]
-        return y_hat, v_hat
+        y_hat, v_hat = self.predict_batch([obj])
+        return y_hat[0], v_hat[0]
+
+    def predict_batch(self, phases):
+        # priors (B, 55) and values (B,) of many phases, in one forward pass
+        data = {
+            "x": torch.from_numpy(LocationInfo.batch_from_active(phases)),
+            "attack": torch.LongTensor([p.phase_attacking for p in phases]),
+        }
+        with torch.no_grad():
+            y_hat, v_hat = self.forward(data)
+        return y_hat.cpu().numpy(), v_hat.cpu().numpy()[:, 0]
+
+    def encode(self, infos):
+        return encode_infos(infos)
 
     def tensorify(self, infos):
+        xs, ys, values, attack = self.encode(infos)
         results = []
-        for info in infos:
-            phase = PhaseInfo.from_string(info.phase)
-            locat = LocationInfo.from_active(phase, phase.active_player)
-            x = np.array(locat, dtype=np.float32)
-            #
-            cards_before = set(int(l) for l in x[:, 1].nonzero()[0])
-            cards_before.add(0)  # yield
-            y = get_keepyness(cards_before, info)
-            #
+        for k in range(len(infos)):
             results.append(
                 {
                     # x is 1, 55, 9
-                    "x": torch.from_numpy(x).unsqueeze(0),
+                    "x": torch.from_numpy(xs[k : k + 1]),
                     # y is 1, 55
-                    "y": torch.from_numpy(y).unsqueeze(0),
-                    "value": torch.FloatTensor([info.value]).unsqueeze(0),
-                    "attack": torch.LongTensor([phase.phase_attacking]),
+                    "y": torch.from_numpy(ys[k : k + 1]),
+                    "value": torch.from_numpy(values[k : k + 1]),
+                    "attack": torch.from_numpy(attack[k : k + 1]),
                 }
             )
         return results
@@ -0,0 +1,79 @@
+from regi_py.core import LocationInfo
+
+#
+import queue
+import time
+import numpy as np
+import torch
+
+
+class RemoteNet:
+    # stands in for the net in an explorer process, the predictions are
+    # made by serve() in the inference server process. every explorer
+    # needs its own client_id and replies queue
+    def __init__(self, client_id, requests, replies, mname="basic"):
+        self.client_id = client_id
+        self.requests = requests
+        self.replies = replies
+        self.__mname__ = mname
+
+    def eval(self):
+        return self
+
+    def predict(self, phase):
+        y_hat, v_hat = self.predict_batch([phase])
+        return y_hat[0], v_hat[0]
+
+    def predict_batch(self, phases):
+        # phases are sent already encoded, so the server only runs the net
+        x = LocationInfo.batch_from_active(phases)
+        attack = np.array([p.phase_attacking for p in phases], dtype=np.int64)
+        self.requests.put((self.client_id, x, attack))
+        return self.replies.get()
+
+
+def serve(model, requests, replies, max_batch=64, max_wait=0.002, refresh=None):
+    # answer RemoteNet requests until None is received. requests that
+    # arrive within max_wait seconds of the first one are evaluated
+    # together, until they hold max_batch phases. refresh is called before every
+    # batch, so the model can be swapped between batches but never
+    # during one
+    model.eval()
+    running = True
+    while running:
+        item = requests.get()
+        if item is None:
+            break
+        batch = [item]
+        rows = len(item[1])
+        deadline = time.perf_counter() + max_wait
+        while rows < max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                running = False
+                break
+            batch.append(item)
+            rows += len(item[1])
+
+        if refresh is not None:
+            refresh(model)
+        data = {
+            "x": torch.from_numpy(np.concatenate([b[1] for b in batch])),
+            "attack": torch.from_numpy(np.concatenate([b[2] for b in batch])),
+        }
+        with torch.no_grad():
+            y_hat, v_hat = model(data)
+        y_hat = y_hat.cpu().numpy()
+        v_hat = v_hat.cpu().numpy()[:, 0]
+
+        start = 0
+        for client_id, x, _ in batch:
+            end = start + len(x)
+            replies[client_id].put((y_hat[start:end], v_hat[start:end]))
+            start = end
@@ -1,12 +1,13 @@
 from regi_py.core import PhaseInfo
 from regi_py.core import LocationInfo
-from regi_py.strats.mcts_explorer import MCTSNode
+from regi_py.strats.mcts_explorer import MCTSNode, split_iterations
 from regi_py.rl.utils import *
 
 #
 import random
 import math
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
 
 class KeepyPUCTNode(MCTSNode):
@@ -20,20 +21,31 @@ class KeepyPUCTNode(MCTSNode):
         prev_combo=None,
         prev_index=None,
         weight=math.sqrt(2),
+        evaluate=True,
     ):
         super().__init__(
             root_phase=root_phase,
             trim=trim,
-            parent=None,
+            parent=parent,
             prev_combo=prev_combo,
             prev_index=prev_index,
             weight=weight,
         )
         self.net = net
         self.prior = prior
+        self.next_priors = None
 
-        #
-        y_hat, v_hat = self.net.predict(root_phase)
+        # evaluate=False leaves the net for later, so that many new
+        # nodes can go through it at once (see search_batched)
+        if evaluate:
+            y_hat, v_hat = self.net.predict(root_phase)
+            self.set_prediction(y_hat, v_hat)
+
+    @property
+    def evaluated(self):
+        return self.next_priors is not None
+
+    def set_prediction(self, y_hat, v_hat):
         self.value += v_hat
         preds = 1 / (1.0 + y_hat)
         self.next_priors = np.zeros(len(self.next_combos), dtype=np.float32)
@@ -53,9 +65,8 @@ class KeepyPUCTNode(MCTSNode):
             v2 = 0
         return v1 + self.prior * self.weight * v2
 
-    def expand(self):
-        i = self.rem_exp_ind.pop()
-        phase = self.next_phases[i]
+    def expand_at(self, i, evaluate=True):
+        phase = self.phase_at(i)
         combo = self.next_combos[i]
         prior = self.next_priors[i]
         new_node = KeepyPUCTNode(
@@ -67,22 +78,99 @@ class KeepyPUCTNode(MCTSNode):
             prev_combo=combo,
             prev_index=i,
             weight=self.weight,
+            evaluate=evaluate,
         )
         self.children.append(new_node)
         self.childmap[str(combo)] = new_node
         return new_node
 
+    @staticmethod
+    def add_virtual_loss(node, loss, sign=1):
+        # sign=-1 takes it back
+        while node is not None:
+            node.visits += sign
+            node.value -= sign * loss
+            node = node.parent
+
+    @staticmethod
+    def search_batched(root_node, iterations, batch_size=8, virtual_loss=1.0):
+        # up to batch_size selections are made before the net is run,
+        # each with a virtual loss along its path so that the next one
+        # prefers other paths. the new leaves then go through the net in
+        # one predict_batch call, and are simulated and updated as usual.
+        # a selection that reaches a leaf still waiting for the net ends
+        # the batch early
+        net = root_node.net
+        done = 0
+        while done < iterations:
+            leaves = []
+            while len(leaves) < min(batch_size, iterations - done):
+                node = MCTSNode.select(root_node)
+                if not node.evaluated:
+                    break
+                if not node.is_terminal():
+                    node = node.expand_at(node.rem_exp_ind.pop(), evaluate=False)
+                KeepyPUCTNode.add_virtual_loss(node, virtual_loss)
+                leaves.append(node)
+
+            pending = [x for x in leaves if not x.evaluated]
+            if len(pending) != 0:
+                y_hat, v_hat = net.predict_batch([x.root_phase for x in pending])
+                for x, y, v in zip(pending, y_hat, v_hat):
+                    x.set_prediction(y, v)
+
+            for node in leaves:
+                KeepyPUCTNode.add_virtual_loss(node, virtual_loss, sign=-1)
+                MCTSNode.update(node, node.simulate())
+            done += len(leaves)
+        return root_node
+
+
+# each worker process gets its own copy of the net, once
+_WORKER_NET = None
+
+
+def _init_worker_net(net):
+    global _WORKER_NET
+    _WORKER_NET = net
+    _WORKER_NET.eval()
+
+
+def _search_in_worker(phase, iterations, trim, weight, batch_size, seed):
+    random.seed(seed)
+    root_node = KeepyPUCTNode(
+        phase, net=_WORKER_NET, prior=1.0, trim=trim, weight=weight
+    )
+    return KeepyPUCTNode.search_batched(root_node, iterations, batch_size).summary()
+
 
 class PUCTExplorerStrategy(BaseStrategy):
     __strat_name__ = "puct-explorer"
 
-    def __init__(self, net, iterations=64, trim=True, weight=math.sqrt(2)):
+    def __init__(
+        self,
+        net,
+        iterations=64,
+        trim=True,
+        weight=math.sqrt(2),
+        workers=1,
+        batch_size=8,
+    ):
         super(PUCTExplorerStrategy, self).__init__()
         self.net = net
         self.iterations = iterations
         self.__strat_name__ = f"puct-{net.__mname__}-{iterations}"
         self.trim = trim
         self.weight = weight
+        # leaves evaluated by the net in one batch, 1 searches one
+        # leaf at a time
+        self.batch_size = batch_size
+        # workers > 1 splits the iterations over independent trees in
+        # worker processes (root parallelism), merged by visit counts.
+        # workers copy the net when the pool starts, so call close()
+        # after changing its weights, and once its games are done
+        self.workers = workers
+        self.pool = None
 
     def setup(self, player, game):
         self.net.eval()
@@ -107,15 +195,49 @@ class PUCTExplorerStrategy(BaseStrategy):
         root_node = KeepyPUCTNode(
             phase, net=self.net, prior=1.0, trim=self.trim, weight=self.weight
         )
+        if self.workers > 1 and not root_node.is_terminal():
+            return self.simulate_parallel(root_node)
+        return KeepyPUCTNode.search_batched(root_node, self.iterations, self.batch_size)
 
-        for i in range(self.iterations):
-            node = MCTSNode.select(root_node)
-            if not node.is_terminal():
-                node = node.expand()
-            reward = node.simulate()
-            MCTSNode.update(node, reward)
+    def simulate_parallel(self, root_node):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker_net,
+                initargs=(self.net,),
+            )
+        futures = [
+            self.pool.submit(
+                _search_in_worker,
+                root_node.root_phase,
+                n,
+                self.trim,
+                self.weight,
+                self.batch_size,
+                random.getrandbits(64),
+            )
+            for n in split_iterations(self.iterations, self.workers)
+        ]
+        for f in futures:
+            root_node.merge(f.result())
         return root_node
 
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # __init__ may have raised before the pool attribute was set
+        if getattr(self, "pool", None) is not None:
+            self.close()
+
     def process_phase(self, phase, combos):
         root_node = self.simulate_node(phase)
         best_combo = root_node.best_combo
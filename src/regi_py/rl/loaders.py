@@ -1,7 +1,11 @@
+from regi_py.core import MAX_CARDS_IN_GAME, MAX_LOCATIONS
+from regi_py.logging.shards import find_shards, load_shard
+from torch.utils.data import Dataset
 from torch.utils.data import IterableDataset
 from torch.utils.data import DataLoader
 import torch
 import random
+import numpy as np
 
 
 class PUCTDataset(IterableDataset):
@@ -27,6 +31,130 @@ class PUCTDataset(IterableDataset):
             self.samples = self.samples + pieces
 
 
+class ReplayBuffer:
+    # samples in preallocated arrays, written as a ring so the oldest
+    # samples are overwritten first. with prioritized=True, samples are
+    # drawn with probability priority^alpha, new samples get the highest
+    # priority seen so far, and update_priorities sets them after training.
+    # the "weight" of a sampled row undoes the bias of that, with beta=1
+    # fully and beta=0 not at all
+    def __init__(
+        self, capacity=128, prioritized=False, alpha=0.6, beta=0.4, seed=None
+    ):
+        self.capacity = capacity
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.rng = np.random.default_rng(seed)
+        rows, cols = MAX_CARDS_IN_GAME, int(MAX_LOCATIONS)
+        self.x = np.zeros((capacity, rows, cols), dtype=np.float32)
+        self.y = np.zeros((capacity, rows), dtype=np.float32)
+        self.value = np.zeros((capacity, 1), dtype=np.float32)
+        self.attack = np.zeros(capacity, dtype=np.int64)
+        self.priorities = np.zeros(capacity, dtype=np.float64)
+        self.max_priority = 1.0
+        self.pos = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, x, y, value, attack):
+        n = len(x)
+        if n > self.capacity:
+            # only the newest samples fit
+            cut = n - self.capacity
+            x, y, value, attack = x[cut:], y[cut:], value[cut:], attack[cut:]
+            n = self.capacity
+        inds = (self.pos + np.arange(n)) % self.capacity
+        self.x[inds] = x
+        self.y[inds] = y
+        self.value[inds] = value
+        self.attack[inds] = attack
+        self.priorities[inds] = self.max_priority
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def add_game(self, net, infos):
+        self.add(*net.encode(infos))
+
+    def sample(self, batch_size):
+        # a batch like collate_dict gives, plus the "index" and the
+        # importance sampling "weight" (B, 1) of every row
+        if self.prioritized:
+            p = self.priorities[: self.size] ** self.alpha
+            p = p / p.sum()
+            inds = self.rng.choice(self.size, size=batch_size, p=p)
+            weight = (self.size * p[inds]) ** -self.beta
+            weight = weight / weight.max()
+        else:
+            inds = self.rng.integers(0, self.size, size=batch_size)
+            weight = np.ones(batch_size)
+        return {
+            "x": torch.from_numpy(self.x[inds]),
+            "y": torch.from_numpy(self.y[inds]),
+            "value": torch.from_numpy(self.value[inds]),
+            "attack": torch.from_numpy(self.attack[inds]),
+            "weight": torch.from_numpy(weight.astype(np.float32).reshape(-1, 1)),
+            "index": inds,
+        }
+
+    def update_priorities(self, inds, errors):
+        priorities = np.abs(np.asarray(errors, dtype=np.float64)).reshape(-1) + 1e-6
+        self.priorities[inds] = priorities
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+
+class ShardDataset(Dataset):
+    # samples from the shards of a ShardWriter. the shards are memory
+    # mapped, so only the rows that are used are read from disk
+    TRAIN_FIELDS = ("x", "y", "value", "attack")
+
+    def __init__(self, folder, seed=None):
+        super().__init__()
+        self.shards = [load_shard(path) for path in find_shards(folder)]
+        self.starts = np.zeros(len(self.shards) + 1, dtype=np.int64)
+        self.starts[1:] = np.cumsum([len(shard["value"]) for shard in self.shards])
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def locate(self, i):
+        k = int(np.searchsorted(self.starts, i, side="right")) - 1
+        return self.shards[k], i - int(self.starts[k])
+
+    def __getitem__(self, i):
+        # a 1-row sample like tensorify gives, so PUCTDataLoader works
+        shard, j = self.locate(i)
+        return {
+            name: torch.from_numpy(np.array(shard[name][j : j + 1]))
+            for name in self.TRAIN_FIELDS
+        }
+
+    def policy(self, i):
+        # visit counts of the moves at sample i
+        shard, j = self.locate(i)
+        offsets = shard["policy_offsets"]
+        return np.array(shard["policy"][offsets[j] : offsets[j + 1]])
+
+    def sample(self, batch_size):
+        # a batch like ReplayBuffer.sample, gathered shard by shard
+        inds = np.sort(self.rng.integers(0, len(self), size=batch_size))
+        ks = np.searchsorted(self.starts, inds, side="right") - 1
+        parts = {name: [] for name in self.TRAIN_FIELDS}
+        for k in np.unique(ks):
+            rows = inds[ks == k] - self.starts[k]
+            for name in self.TRAIN_FIELDS:
+                parts[name].append(self.shards[k][name][rows])
+        batch = {
+            name: torch.from_numpy(np.concatenate(parts[name]))
+            for name in self.TRAIN_FIELDS
+        }
+        batch["index"] = inds
+        return batch
+
+
 def collate_dict(objs):
     res = dict()
     for k in objs[0].keys():
@@ -1,6 +1,7 @@
 from regi_py.core import *
 from regi_py.logging import DummyLog
 from regi_py.strats.phase_utils import *
+from regi_py.logging.shards import LocationCheck, get_keepyness, encode_infos
 
 #
 from collections import defaultdict, UserDict
@@ -12,37 +13,6 @@ import sys
 import time
 
 
-class LocationCheck:
-
-    CARD_STRINGS = ["yield"] + [
-        str(Card.from_location(i)) for i in range(1, MAX_CARDS_IN_GAME)
-    ]
-
-    @classmethod
-    def get_locs_in_combo(cls, locs, combo_str):
-        res = set()
-        for loc in locs:
-            if cls.CARD_STRINGS[loc] in combo_str:
-                res.add(loc)
-        if len(res) == 0 or "yield" in combo_str:
-            res.add(0)
-        return res
-
-
-def get_keepyness(hand_locs, info):
-    arr = np.zeros(MAX_CARDS_IN_GAME, dtype=np.float32)
-    if len(info.N1) != 0:
-        played_locs = LocationCheck.get_locs_in_combo(
-            hand_locs, info.combos[info.sel_index]
-        )
-        kept_locs = hand_locs - played_locs
-    else:
-        kept_locs = hand_locs
-    for ind in kept_locs:
-        arr[ind] = 1
-    return arr
-
-
 def normalize_probs(arr):
     t = np.sum(arr)
     if t != 0:
@@ -70,10 +40,9 @@ class PhaseLoader:
         return self._inverse[s]
 
     def __getitem__(self, phase):
-        pstr = phase.to_string()
-        ctr = self._forward.get(pstr, self._counter)
+        ctr = self._forward.get(phase, self._counter)
         if ctr == self._counter:
-            self._forward[pstr] = self._counter
+            self._forward[phase] = self._counter
             self._inverse[self._counter] = phase
             # print(phase, "gets the index", self._counter)
             self._counter += 1
@@ -1,21 +1,55 @@
 import random
+import math
 import numpy as np
 
 #
 from regi_py.core import BaseStrategy
 from regi_py.core import RandomStrategy
+from regi_py.core import simulate_batch
 from regi_py.strats.recommender import RecommenderMixin
 from regi_py.strats.phase_utils import *
 
 
+def quantile_bounds(samples, q, z):
+    # (lower, upper) order statistics around the q-quantile of every row,
+    # z binomial standard deviations of rank away from it
+    n = samples.shape[1]
+    srt = np.sort(samples, axis=1)
+    k = q * (n - 1)
+    d = z * math.sqrt(n * q * (1 - q))
+    lo = srt[:, max(0, math.floor(k - d))]
+    hi = srt[:, min(n - 1, math.ceil(k + d))]
+    return lo, hi
+
+
 class BruteSamplingStrategy(BaseStrategy, RecommenderMixin):
     __strat_name__ = "brute"
 
-    def __init__(self, iterations=128, num_recos=5):
+    def __init__(
+        self,
+        iterations=128,
+        num_recos=5,
+        batched=True,
+        adaptive=False,
+        min_rollouts=16,
+        confidence=2.0,
+    ):
         super().__init__()
-        self.__strat_name__ = f"brute-{iterations}"
+        self.__strat_name__ = f"brute-{iterations}" + ("-sh" if adaptive else "")
         self.iterations = iterations
         self.num_recos = num_recos
+        # batched plays all the rollouts of a decision in one
+        # simulate_batch call, instead of one quick_game_value at a time
+        self.batched = batched
+        # adaptive does successive halving: every move starts with
+        # min_rollouts, then moves in the worse half are dropped and the
+        # rest get twice as many rollouts, until one is left or iterations
+        # is reached. a move is only dropped when the upper bound of its
+        # value is below the lower bound of the best move, with bounds
+        # confidence standard deviations wide
+        self.adaptive = adaptive
+        self.min_rollouts = min_rollouts
+        self.confidence = confidence
 
     def setup(self, player, game):
         return 0
@@ -24,35 +58,84 @@ class BruteSamplingStrategy(BaseStrategy, RecommenderMixin):
         offset = random.randint(1, game.num_players - 1)
         return (game.active_player + offset) % game.num_players
 
-    def process_moves(self, root_phase, combos):
-        next_phases, next_combos = get_expansion_at(root_phase, trim=True)
-        B = self.iterations
-
-        N = len(next_combos)
-        vals = [0] * N
-        val_cur = np.zeros(B, dtype=np.float32)
+    def rollout_values(self, next_phases, B=None):
+        # (N, B) array of quick_game_value(..., relative_diff=True)
+        B = self.iterations if B is None else B
+        if self.batched:
+            res = simulate_batch(next_phases, "random", B, seed=random.getrandbits(64))
+            start = np.array([enemy_hp_left(p) for p in next_phases], dtype=np.float32)
+            vals = (start[:, None] - res["enemy_hp"]) / 360
+            return np.where(res["end_value"] == 1, 2, vals).astype(np.float32)
 
-        for i in range(N):
+        vals = np.zeros((len(next_phases), B), dtype=np.float32)
+        for i, phase in enumerate(next_phases):
             for b in range(B):
-                val_cur[b] = quick_game_value(
-                    next_phases[i], strat_klass=RandomStrategy, relative_diff=True
+                vals[i, b] = quick_game_value(
+                    phase, strat_klass=RandomStrategy, relative_diff=True
                 )
-            # print(val_cur)
+        return vals
+
+    def move_penalties(self, root_phase, next_combos):
+        N = len(next_combos)
+        penalties = np.zeros(N, dtype=np.float32)
+        for i in range(N):
             if root_phase.phase_attacking:
-                yield_penalty = random.random() * int(next_combos[i].bitwise == 0)
-                vals[i] = np.quantile(val_cur, 0.9) - yield_penalty
+                penalties[i] = random.random() * int(next_combos[i].bitwise == 0)
             else:
                 def_penalty = defend_throwing(i, root_phase, next_combos, score_only=True)
-                vals[i] = np.quantile(val_cur, 0.9) - 0.5 * def_penalty
+                penalties[i] = 0.5 * def_penalty
+        return penalties
+
+    def halving_scores(self, next_phases, penalties):
+        # successive halving over the moves, returns the rank of every move:
+        # moves dropped in a later round rank above the ones dropped earlier,
+        # and moves dropped in the same round are ranked by their value
+        N = len(next_phases)
+        samples = np.zeros((N, self.iterations), dtype=np.float32)
+        survived = np.zeros(N, dtype=np.int32)
+        vals = np.zeros(N, dtype=np.float32)
+        alive = np.arange(N)
+        have = 0
+        want = min(self.min_rollouts, self.iterations)
+        while True:
+            phases = [next_phases[i] for i in alive]
+            samples[alive, have:want] = self.rollout_values(phases, want - have)
+            have = want
+            vals[alive] = np.quantile(samples[alive, :have], 0.9, axis=1)
+            vals[alive] -= penalties[alive]
+            survived[alive] += 1
+            if len(alive) <= 1 or have >= self.iterations:
+                break
+            lo, hi = quantile_bounds(samples[alive, :have], 0.9, self.confidence)
+            lo -= penalties[alive]
+            hi -= penalties[alive]
+            order = np.argsort(vals[alive])[::-1]
+            worse = order[(len(alive) + 1) // 2 :]
+            dropped = worse[hi[worse] < lo[order[0]]]
+            alive = np.delete(alive, dropped)
+            want = min(2 * have, self.iterations)
+
+        # ties go to the lower index, as np.argmax does for full scoring
+        ranks = np.zeros(N, dtype=np.float32)
+        ranks[np.lexsort((-np.arange(N), vals, survived))] = np.arange(N)
+        return ranks
+
+    def process_moves(self, root_phase, combos):
+        next_phases, next_combos = get_expansion_at(root_phase, trim=True)
+        penalties = self.move_penalties(root_phase, next_combos)
 
-        val_arr = np.array(vals)
+        if self.adaptive:
+            val_arr = self.halving_scores(next_phases, penalties)
+        else:
+            quantiles = np.quantile(self.rollout_values(next_phases), 0.9, axis=1)
+            val_arr = quantiles - penalties
         return next_combos, val_arr
 
     def get_best_move(self, root_phase, combos):
         moves, scores = self.process_moves(root_phase, combos)
         best = int(np.argmax(scores))
 
-        best_move = next_combos[best]
+        best_move = moves[best]
         for ind, c in enumerate(combos):
             if c.bitwise == best_move.bitwise:
                 return ind
@@ -1,5 +1,6 @@
 from regi_py.core import BaseStrategy
 from regi_py.core import RandomStrategy
+from regi_py.core import MCTSSearch
 from regi_py.strats.recommender import RecommenderMixin
 from regi_py.strats.phase_utils import *
 from regi_py.strats.sub_random import SubsetRandomStrategy
@@ -7,6 +8,9 @@ from regi_py.strats.sub_random import SubsetRandomStrategy
 #
 import random
 import math
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from typing import Tuple, Optional
 
@@ -22,6 +26,57 @@ class MCTSNodeInfo:
     offset: int  # nonzero if a redirect happened, the offset from the current player
 
 
+class MCTSEntry:
+    # what every node at the same phase shares: expansion and statistics.
+    # the phase after a move is only computed when it is first needed
+    __slots__ = (
+        "game",
+        "next_combos",
+        "next_indices",
+        "next_phases",
+        "visits",
+        "value",
+    )
+
+    def __init__(self, game, next_combos, next_indices):
+        self.game = game
+        self.next_combos = next_combos
+        self.next_indices = next_indices
+        self.next_phases = [None] * len(next_combos)
+        self.visits = 0
+        self.value = 0.0
+
+    def phase_at(self, i):
+        if self.next_phases[i] is None:
+            self.next_phases[i] = phase_after_move(self.game, self.next_indices[i])
+        return self.next_phases[i]
+
+
+class TranspositionTable:
+    # phase -> MCTSEntry, dropping the least recently used entry when full
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def get(self, phase):
+        entry = self.entries.get(phase)
+        if entry is not None:
+            self.entries.move_to_end(phase)
+        return entry
+
+    def put(self, phase, entry):
+        self.entries[phase] = entry
+        self.entries.move_to_end(phase)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
 class MCTSNode:
     def __init__(
         self,
@@ -31,6 +86,8 @@ class MCTSNode:
         prev_combo=None,
         prev_index=None,
         weight=math.sqrt(2),
+        table=None,
+        widening=None,
     ):
         self.root_phase = root_phase
         self.trim = trim
@@ -38,28 +95,62 @@ class MCTSNode:
         self.weight = weight
         self.prev_combo = prev_combo
         self.prev_index = prev_index
+        self.table = table
+        # progressive widening (c, alpha): at most c * visits^alpha children
+        self.widening = widening
         #
+        self.entry = None
         self.next_phases = []
         self.next_combos = []
         self.rem_exp_ind = []
         self.children = []
         self.childmap = dict()
-        self.visits = 0
-        self.value = 0.0
         self._load_expansion()
 
     def _load_expansion(self):
-        if self.root_phase.game_endvalue != 0:
-            return
-        n, c = get_expansion_at(self.root_phase, trim=self.trim)
-        self.next_phases = n
-        self.next_combos = c
-        assert len(n) == len(c)
-        self.rem_exp_ind = list(range(len(c)))
+        # with a table, nodes reached through different move orders
+        # share the expansion and the statistics of their phase
+        if self.table is not None:
+            self.entry = self.table.get(self.root_phase)
+        if self.entry is None:
+            if self.root_phase.game_endvalue != 0:
+                g, c, i = None, [], []
+            else:
+                g, c, i = get_moves_at(self.root_phase, trim=self.trim)
+            self.entry = MCTSEntry(g, c, i)
+            if self.table is not None:
+                self.table.put(self.root_phase, self.entry)
+        self.next_phases = self.entry.next_phases
+        self.next_combos = self.entry.next_combos
+        self.rem_exp_ind = list(range(len(self.next_combos)))
         random.shuffle(self.rem_exp_ind)
 
+    @property
+    def visits(self):
+        return self.entry.visits
+
+    @visits.setter
+    def visits(self, v):
+        self.entry.visits = v
+
+    @property
+    def value(self):
+        return self.entry.value
+
+    @value.setter
+    def value(self, v):
+        self.entry.value = v
+
     def can_expand_further(self):
-        return len(self.rem_exp_ind) != 0
+        if len(self.rem_exp_ind) == 0:
+            return False
+        if self.widening is None or len(self.children) == 0:
+            return True
+        c, alpha = self.widening
+        return len(self.children) < c * (self.visits**alpha)
+
+    def phase_at(self, i):
+        return self.entry.phase_at(i)
 
     def is_terminal(self):
         return self.root_phase.game_endvalue != 0
@@ -116,6 +207,18 @@ class MCTSNode:
         v2 = math.sqrt(math.log(self.parent.visits) / self.visits)
         return v1 + self.weight * v2
 
+    def find(self, phase):
+        # breadth-first, the phase we look for is usually a few moves away
+        frontier = [self]
+        while len(frontier) != 0:
+            children = []
+            for node in frontier:
+                if node.root_phase == phase:
+                    return node
+                children.extend(node.children)
+            frontier = children
+        return None
+
     @staticmethod
     def select(node):
         while not node.can_expand_further():
@@ -125,16 +228,20 @@ class MCTSNode:
         return node
 
     def expand(self):
-        i = self.rem_exp_ind.pop()
-        phase = self.next_phases[i]
+        return self.expand_at(self.rem_exp_ind.pop())
+
+    def expand_at(self, i):
+        phase = self.phase_at(i)
         combo = self.next_combos[i]
         new_node = MCTSNode(
             phase,
             trim=self.trim,
-            parent=node,
+            parent=self,
             prev_combo=combo,
             prev_index=i,
             weight=self.weight,
+            table=self.table,
+            widening=self.widening,
         )
         self.children.append(new_node)
         self.childmap[str(combo)] = new_node
@@ -185,19 +292,230 @@ class MCTSNode:
             node.value += reward
             node = node.parent
 
+    @staticmethod
+    def search(root_node, iterations):
+        for i in range(iterations):
+            node = MCTSNode.select(root_node)
+            if not node.is_terminal():
+                node = node.expand()
+            reward = node.simulate()
+            MCTSNode.update(node, reward)
+        return root_node
+
+    def summary(self):
+        # statistics of this node and its children, small enough to
+        # send back from a worker process. children are keyed by combo,
+        # since trimming can give another process different expansions
+        return (
+            self.visits,
+            self.value,
+            [(x.prev_combo.bitwise, x.visits, x.value) for x in self.children],
+        )
+
+    def merge(self, summary):
+        # add the statistics of an independent search from this phase
+        visits, value, children = summary
+        self.visits += visits
+        self.value += value
+        indices = {c.bitwise: i for i, c in enumerate(self.next_combos)}
+        for bitwise, n, w in children:
+            i = indices.get(bitwise)
+            if i is None:
+                continue
+            child = self.childmap.get(str(self.next_combos[i]))
+            if child is None:
+                self.rem_exp_ind.remove(i)
+                child = self.expand_at(i)
+            child.visits += n
+            child.value += w
+
+
+class NativeMCTSChild:
+    # a root move of a native search, read like an MCTSNode child
+    __slots__ = ("search", "prev_index", "prev_combo", "visits", "value", "_phase")
+
+    def __init__(self, search, prev_index, prev_combo, visits, value):
+        self.search = search
+        self.prev_index = prev_index
+        self.prev_combo = prev_combo
+        self.visits = visits
+        self.value = value
+        self._phase = None
+
+    @property
+    def root_phase(self):
+        if self._phase is None:
+            self._phase = self.search.phase_after(self.prev_index)
+        return self._phase
+
+
+class NativeMCTSRoot:
+    # the root of an MCTSSearch from core, with the parts of the
+    # MCTSNode interface that the strategies use
+    def __init__(self, search):
+        self.search = search
+        self.root_phase = search.root_phase
+        self.next_combos = search.moves
+        # a rerooted search starts with the visits of earlier decisions
+        self.visits = search.visits
+        self.value = search.value
+        self.child_visits = list(search.move_visits)
+        self.child_values = list(search.move_values)
+        # ties in visits are broken by a shuffled order of the moves, like
+        # MCTSNode does with its shuffled expansions, not by move index
+        # (which would favor the yield at index 0)
+        self.tiebreak = list(range(len(self.next_combos)))
+        random.shuffle(self.tiebreak)
+
+    def is_terminal(self):
+        return self.root_phase.game_endvalue != 0
+
+    def run(self, iterations):
+        v0, w0 = self.search.visits, self.search.value
+        n0, x0 = self.search.move_visits, self.search.move_values
+        self.search.run(iterations)
+        self.visits += self.search.visits - v0
+        self.value += self.search.value - w0
+        n1, x1 = self.search.move_visits, self.search.move_values
+        for i in range(len(self.next_combos)):
+            self.child_visits[i] += n1[i] - n0[i]
+            self.child_values[i] += x1[i] - x0[i]
+        return self
+
+    @property
+    def children(self):
+        return [
+            NativeMCTSChild(self.search, i, c, n, w)
+            for i, (c, n, w) in enumerate(
+                zip(self.next_combos, self.child_visits, self.child_values)
+            )
+            if n > 0
+        ]
+
+    @property
+    def best_child_node(self):
+        return max(
+            self.children, key=lambda x: (x.visits, -self.tiebreak[x.prev_index])
+        )
+
+    @property
+    def best_combo(self):
+        return self.best_child_node.prev_combo
+
+    @property
+    def best_next_phase(self):
+        return self.best_child_node.root_phase
+
+    def export(self):
+        if self.visits > 0:
+            sel_index = self.best_child_node.prev_index
+        else:
+            sel_index = 0
+        return MCTSNodeInfo(
+            phase=str(self.root_phase),
+            value=self.value,
+            N0=self.visits,
+            N1=tuple(self.child_visits),
+            combos=tuple(str(c) for c in self.next_combos),
+            sel_index=sel_index,
+            offset=0,
+        )
+
+    def summary(self):
+        return (
+            self.visits,
+            self.value,
+            [(x.prev_combo.bitwise, x.visits, x.value) for x in self.children],
+        )
+
+    def merge(self, summary):
+        visits, value, children = summary
+        self.visits += visits
+        self.value += value
+        indices = {c.bitwise: i for i, c in enumerate(self.next_combos)}
+        for bitwise, n, w in children:
+            i = indices.get(bitwise)
+            if i is not None:
+                self.child_visits[i] += n
+                self.child_values[i] += w
+
+
+def split_iterations(iterations, workers):
+    # as even as possible, and no worker gets zero
+    workers = max(1, min(workers, iterations))
+    return [iterations // workers + (i < iterations % workers) for i in range(workers)]
+
+
+def _search_in_worker(
+    phase, iterations, trim, weight, seed, backend="python", widening=None
+):
+    random.seed(seed)
+    if backend == "native":
+        root_node = NativeMCTSRoot(MCTSSearch(phase, trim, weight, seed=seed))
+        return root_node.run(iterations).summary()
+    root_node = MCTSNode(phase, trim=trim, weight=weight, widening=widening)
+    return MCTSNode.search(root_node, iterations).summary()
+
 
 class MCTSExplorerStrategy(BaseStrategy, RecommenderMixin):
     __strat_name__ = "mcts-explorer"
 
-    def __init__(self, iterations=64, trim=True, weight=math.sqrt(2), num_recos=5):
+    def __init__(
+        self,
+        iterations=64,
+        trim=True,
+        weight=math.sqrt(2),
+        num_recos=5,
+        table_size=0,
+        reuse_tree=True,
+        workers=1,
+        backend=None,
+        widening=None,
+    ):
         super(MCTSExplorerStrategy, self).__init__()
         self.iterations = iterations
         self.__strat_name__ = f"mcts-{iterations}"
         self.trim = trim
         self.weight = weight
         self.num_recos = num_recos
+        # "native" runs the search loop in MCTSSearch from core, "python"
+        # uses MCTSNode. table_size and widening (see MCTSNode) only
+        # apply to "python", which is the default when they are given
+        python_only = (
+            ("table_size", table_size > 0),
+            ("widening", widening is not None),
+        )
+        if backend is None:
+            backend = "python" if any(used for _, used in python_only) else "native"
+        if backend not in ("native", "python"):
+            raise ValueError(f"unknown MCTS backend {backend}")
+        if backend == "native":
+            unsupported = [name for name, used in python_only if used]
+            if unsupported:
+                raise ValueError(
+                    f"backend='native' does not support {', '.join(unsupported)}, "
+                    "use backend='python'"
+                )
+        self.backend = backend
+        self.widening = widening
+        # table_size > 0 shares search results between transposed phases,
+        # and between the decisions of one game
+        self.table = TranspositionTable(table_size) if table_size > 0 else None
+        # reuse_tree continues from the subtree of the previous search
+        # that reached the current phase, keeping its visits
+        self.reuse_tree = reuse_tree
+        self.last_root = None
+        # workers > 1 splits the iterations over independent trees in
+        # worker processes (root parallelism), merged by visit counts.
+        # the pool starts on the first search, call close() (or use the
+        # strategy as a context manager) once its games are done
+        self.workers = workers
+        self.pool = None
 
     def setup(self, player, game):
+        if self.table is not None:
+            self.table.clear()
+        self.last_root = None
         return 0
 
     def getRedirectIndex(self, player, game):
@@ -215,17 +533,80 @@ class MCTSExplorerStrategy(BaseStrategy, RecommenderMixin):
             next_player = (game.active_player + offset) % game.num_players
         return next_player
 
-    def simulate_node(self, phase):
-        root_node = MCTSNode(phase, trim=self.trim, weight=self.weight)
+    def get_root_node(self, phase):
+        if self.backend == "native":
+            search = None
+            if self.reuse_tree and self.last_root is not None:
+                if self.last_root.search.reroot(phase):
+                    search = self.last_root.search
+            if search is None:
+                search = MCTSSearch(
+                    phase, self.trim, self.weight, seed=random.getrandbits(64)
+                )
+            root_node = NativeMCTSRoot(search)
+            if self.reuse_tree:
+                self.last_root = root_node
+            return root_node
+        root_node = None
+        if self.reuse_tree and self.last_root is not None:
+            root_node = self.last_root.find(phase)
+        if root_node is None:
+            root_node = MCTSNode(
+                phase,
+                trim=self.trim,
+                weight=self.weight,
+                table=self.table,
+                widening=self.widening,
+            )
+        root_node.parent = None
+        if self.reuse_tree:
+            self.last_root = root_node
+        return root_node
 
-        for i in range(self.iterations):
-            node = MCTSNode.select(root_node)
-            if not node.is_terminal():
-                node = node.expand()
-            reward = node.simulate()
-            MCTSNode.update(node, reward)
+    def simulate_node(self, phase):
+        root_node = self.get_root_node(phase)
+        if self.workers > 1 and not root_node.is_terminal():
+            return self.simulate_parallel(root_node)
+        if self.backend == "native":
+            return root_node.run(self.iterations)
+        return MCTSNode.search(root_node, self.iterations)
+
+    def simulate_parallel(self, root_node):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        futures = [
+            self.pool.submit(
+                _search_in_worker,
+                root_node.root_phase,
+                n,
+                self.trim,
+                self.weight,
+                random.getrandbits(64),
+                self.backend,
+                self.widening,
+            )
+            for n in split_iterations(self.iterations, self.workers)
+        ]
+        for f in futures:
+            root_node.merge(f.result())
         return root_node
 
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # __init__ may have raised before the pool attribute was set
+        if getattr(self, "pool", None) is not None:
+            self.close()
+
     def process_phase(self, phase, combos):
         root_node = self.simulate_node(phase)
         best_combo = root_node.best_combo
@@ -258,8 +639,27 @@ class MCTSExplorerStrategy(BaseStrategy, RecommenderMixin):
 class MCTSSaverStrategy(MCTSExplorerStrategy):
     __strat_name__ = "mcts-saver"
 
-    def __init__(self, iterations=64, trim=True, weight=math.sqrt(2)):
-        super(MCTSSaverStrategy, self).__init__(iterations, trim, weight)
+    def __init__(
+        self,
+        iterations=64,
+        trim=True,
+        weight=math.sqrt(2),
+        table_size=0,
+        reuse_tree=True,
+        workers=1,
+        backend=None,
+        widening=None,
+    ):
+        super(MCTSSaverStrategy, self).__init__(
+            iterations,
+            trim,
+            weight,
+            table_size=table_size,
+            reuse_tree=reuse_tree,
+            workers=workers,
+            backend=backend,
+            widening=widening,
+        )
         self.history = []
 
     def getRedirectIndex(self, player, game):
@@ -1,5 +1,4 @@
 from regi_py.core import *
-from regi_py.logging import DummyLog
 import random
 
 
@@ -128,12 +127,12 @@ class PhaseRecorderStrategy(BaseStrategy):
         self.prev_a = a
 
     def process_phase(self, phase, combos):
-        if str(phase) == str(self.root_phase):
+        if phase == self.root_phase:
             if self.is_recording:
                 self.root_combos = combos
                 self.next_phases = [None] * len(combos)
             self.prev_phase = phase
-        elif str(self.prev_phase) == str(self.root_phase):
+        elif self.prev_phase == self.root_phase:
             self.mark_combo(phase)
             self.prev_phase = phase
         if self.shortcut is not None:
@@ -167,57 +166,49 @@ def indexify(move, combos):
     return 0
 
 
-def get_expansion_at(root_phase, trim=False):
-    log = DummyLog()
+def get_moves_at(root_phase, trim=False):
+    # the moves get_expansion_at would expand, without playing them.
+    # returns the game at root_phase, the moves, and their indices
+    # among the legal moves, for phase_after_move
+    log = NullLog()
     tmp = GameState(log)
-    exp_strat = PhaseRecorderStrategy(root_phase)
+    exp_strat = RandomStrategy()
     for i in range(root_phase.num_players):
         tmp.add_player(exp_strat)
 
     tmp._init_phaseinfo(root_phase)
-    tmp.start_loop()
-    root_combos = exp_strat.root_combos
-    exp_strat.is_recording = False
+    all_combos, _, _ = tmp.legal_moves()
+    root_combos = all_combos
+
+    if len(root_combos) == 0:
+        return tmp, [], []
 
     if trim:
         if root_phase.phase_attacking:
             root_combos = get_nonbad_attacks(None, root_combos)
         else:
             root_combos = get_nonbad_defends(None, root_combos)
-        exp_strat.root_combos = root_combos
-        exp_strat.next_phases = [None] * len(root_combos)
-
-    if root_combos is None:
-        return [], []
-
-    for i in range(len(root_combos)):
-        exp_strat.shortcut = i
-        tmp._init_phaseinfo(root_phase)
-        tmp.start_loop()
-        if exp_strat.next_phases[i] is None:
-            exp_strat.next_phases[i] = tmp.export_phaseinfo()
 
-    next_phases = exp_strat.next_phases
-    assert len(next_phases) == len(root_combos)
-    # print(root_phase.player_cards[root_phase.active_player])
-    for i, x in enumerate(next_phases):
-        assert x is not None
-        # print(root_combos[i], x.player_cards[x.active_player])
+    indices = [indexify(combo, all_combos) for combo in root_combos]
+    return tmp, root_combos, indices
 
-    return next_phases, root_combos
 
+def phase_after_move(game, index):
+    # fork the game instead of replaying it
+    child = game.clone()
+    child.apply(index)
+    return child.export_phaseinfo()
 
-class QuickLog(DummyLog):
-    def __init__(self):
-        super().__init__()
-        self.reason = None
 
-    def endgame(self, reason, game):
-        self.reason = reason
+def get_expansion_at(root_phase, trim=False):
+    game, root_combos, indices = get_moves_at(root_phase, trim=trim)
+    next_phases = [phase_after_move(game, i) for i in indices]
+    assert len(next_phases) == len(root_combos)
+    return next_phases, root_combos
 
 
 def quick_game_sim(root_phase, strat_klass):
-    log = QuickLog()
+    log = StatsLog()
     tmp = GameState(log)
     exp_strat = strat_klass()
     for i in range(root_phase.num_players):
@@ -1,10 +1,12 @@
 from regi_py.core import BaseStrategy
+from regi_py.core import PreserveStrategy
 from regi_py.strats.phase_utils import *
 import random
 
 
-class PreserveStrategy(BaseStrategy):
-    __strat_name__ = "preserve"
+# PreserveStrategy is native, this is the same strategy in python
+class PyPreserveStrategy(BaseStrategy):
+    __strat_name__ = "preserve-py"
 
     def setup(self, player, game):
         return 0
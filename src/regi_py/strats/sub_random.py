@@ -1,10 +1,12 @@
 from regi_py.core import BaseStrategy
+from regi_py.core import SubsetRandomStrategy
 from regi_py.strats.phase_utils import *
 import random
 
 
-class SubsetRandomStrategy(BaseStrategy):
-    __strat_name__ = "sub-random"
+# SubsetRandomStrategy is native, this is the same strategy in python
+class PySubsetRandomStrategy(BaseStrategy):
+    __strat_name__ = "sub-random-py"
 
     def setup(self, player, game):
         return 0
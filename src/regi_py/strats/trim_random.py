@@ -1,10 +1,12 @@
 from regi_py.core import BaseStrategy
+from regi_py.core import TrimmedRandomStrategy
 from regi_py.strats.phase_utils import *
 import random
 
 
-class TrimmedRandomStrategy(BaseStrategy):
-    __strat_name__ = "trim-random"
+# TrimmedRandomStrategy is native, this is the same strategy in python
+class PyTrimmedRandomStrategy(BaseStrategy):
+    __strat_name__ = "trim-random-py"
 
     def setup(self, player, game):
         return 0
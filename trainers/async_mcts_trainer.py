@@ -14,7 +14,7 @@ from dataclasses import dataclass
 
 #
 from regi_py.core import PhaseInfo
-from regi_py import GameState, DummyLog, CXXConsoleLog
+from regi_py import GameState, NullLog, StatsLog, CXXConsoleLog
 from regi_py import get_strategy_map
 from regi_py.strats import RandomStrategy
 from regi_py.rl import (
@@ -22,37 +22,37 @@ from regi_py.rl import (
     PUCTExplorerStrategy,
     NetDirectStrategy,
     KeepyPUCTNode,
-    PUCTDataset,
-    PUCTDataLoader,
+    ReplayBuffer,
+    RemoteNet,
+    serve,
 )
 
 
 def run_epoch(model, data, optimizer):
     y_hat, v_hat = model(data)
-    loss = model.calculate_loss(data["y"], data["value"], y_hat, v_hat)
+    loss = model.calculate_loss(
+        data["y"], data["value"], y_hat, v_hat, weight=data.get("weight")
+    )
     optimizer.zero_grad()
     loss.backward()
     optimizer.step()
-    return loss.item()
+    # value errors, for prioritized replay
+    errors = (v_hat.detach() - data["value"]).abs().cpu().numpy()
+    return loss.item(), errors
 
 
 def total_enemy_hp(game):
     return sum(x.hp for x in game.enemy_pile)
 
 
-class EndGameLog(DummyLog):
-    def __init__(self):
-        super().__init__()
-        self.e0 = 0
-        self.e1 = 0
-        self.reason = None
-
-    def startgame(self, game):
-        self.e0 = total_enemy_hp(game)
+class EndGameLog(StatsLog):
+    @property
+    def e0(self):
+        return self.start_hp
 
-    def endgame(self, reason, game):
-        self.reason = reason
-        self.e1 = total_enemy_hp(game)
+    @property
+    def e1(self):
+        return self.end_hp
 
     def diffe(self):
         return f"{self.e0-self.e1}({self.reason.value})"
@@ -65,12 +65,15 @@ def test_model(episode, model, num_simulations):
     for s in range(10):
         game = GameState(log)
         num_players = random.randint(2, 4)
-        for i in range(num_players):
-            game.add_player(PUCTExplorerStrategy(model))
+        strats = [PUCTExplorerStrategy(model) for i in range(num_players)]
+        for strat in strats:
+            game.add_player(strat)
         game.initialize()
         e0 = total_enemy_hp(game)
         game.start_loop()
         e1 = total_enemy_hp(game)
+        for strat in strats:
+            strat.close()
         diffe.append(log.diffe())
     print("test games:", diffe, file=sys.stderr)
     torch.save(model.state_dict(), f"./weights/model_{model.__mname__}_{episode}.pt")
@@ -133,13 +136,16 @@ def get_split_optimizer(model):
     return optimizer
 
 
-def infinite(loader):
-    while True:
-        for batch in loader:
-            yield batch
-
-
-def trainer(tid, shared_model, queue, train_device, test_device, params):
+def trainer(
+    tid,
+    shared_model,
+    model_lock,
+    model_version,
+    queue,
+    train_device,
+    test_device,
+    params,
+):
     print(f"P{tid} on {train_device} to train")
     torch.set_num_threads(params.num_threads)
     with torch.device(train_device):
@@ -158,11 +164,10 @@ def trainer(tid, shared_model, queue, train_device, test_device, params):
         bench_model.eval()
 
     ep = 0
-    dataset = PUCTDataset(maxsize=params.memory_size)
-    loader = PUCTDataLoader(
-        dataset=dataset,
-        batch_size=params.batch_size,
-        num_workers=0,
+    dataset = ReplayBuffer(
+        capacity=params.memory_size,
+        prioritized=params.prioritized,
+        beta=params.priority_beta,
     )
     while ep < params.num_episodes:
         if queue.qsize() >= 1:
@@ -177,10 +182,11 @@ def trainer(tid, shared_model, queue, train_device, test_device, params):
             continue
 
         losses = []
-        ldr = infinite(loader)
         for e in range(params.epochs):
-            batch = next(ldr)
-            loss = run_epoch(train_model, batch, optimizer)
+            batch = dataset.sample(params.batch_size)
+            loss, errors = run_epoch(train_model, batch, optimizer)
+            if dataset.prioritized:
+                dataset.update_priorities(batch["index"], errors)
             losses.append(loss)
 
         print(
@@ -198,25 +204,18 @@ def trainer(tid, shared_model, queue, train_device, test_device, params):
             threshold=0.1,
         ):
             print("episode", ep, "updated model", file=sys.stderr)
-            shared_model.load_state_dict(train_model.state_dict())
+            with model_lock:
+                shared_model.load_state_dict(train_model.state_dict())
+                model_version.value += 1
             # test_model(ep, shared_model, params.num_simulations)
             ep += 1
 
     torch.save(shared_model.state_dict(), f"./weights/model_{model.__mname__}_end.pt")
 
 
-def simulate_node(root_node, iterations):
-    for i in range(iterations):
-        node = KeepyPUCTNode.select(root_node)
-        if not node.is_terminal():
-            node = node.expand()
-        reward = node.simulate()
-        KeepyPUCTNode.update(node, reward)
-
-
-def run_single_game(tid, i, net, num_bots, num_iterations):
+def run_single_game(tid, i, net, num_bots, num_iterations, search_batch):
     a = time.time()
-    log = DummyLog()
+    log = NullLog()
     strat = RandomStrategy()
     game = GameState(log)
     for _ in range(num_bots):
@@ -228,7 +227,7 @@ def run_single_game(tid, i, net, num_bots, num_iterations):
     node = KeepyPUCTNode(start_phase, net=net, prior=1.0, trim=True, weight=1.414)
     s0 = sum(max(x.hp, 0) for x in node.root_phase.enemy_pile)
     while node.root_phase.game_endvalue == 0:
-        simulate_node(node, num_iterations)
+        KeepyPUCTNode.search_batched(node, num_iterations, search_batch)
         history.append(node.export())
         child = node.best_child_node
         child.parent = None
@@ -245,7 +244,35 @@ def run_single_game(tid, i, net, num_bots, num_iterations):
     return history
 
 
+def inference_server(
+    tid, shared_model, model_lock, model_version, requests, replies, device, params
+):
+    print(f"P{tid} on {device} to serve predictions")
+    torch.set_num_threads(params.num_threads)
+    with torch.device(device):
+        model = BasicNet()
+        model.device = device
+    seen = [-1]
+
+    def refresh(model):
+        # a private copy, so trainer updates land between batches
+        if model_version.value != seen[0]:
+            with model_lock:
+                model.load_state_dict(shared_model.state_dict())
+                seen[0] = model_version.value
+
+    serve(
+        model,
+        requests,
+        replies,
+        max_batch=params.server_batch,
+        max_wait=params.server_wait_ms / 1000,
+        refresh=refresh,
+    )
+
+
 def explorer(tid, shared_model, queue, device, params):
+    # shared_model is a RemoteNet when there is an inference server
     print(f"P{tid} on {device} to explore")
     torch.set_num_threads(params.num_threads)
     count = 0
@@ -258,6 +285,7 @@ def explorer(tid, shared_model, queue, device, params):
                 net=shared_model,
                 num_bots=num_bots,
                 num_iterations=params.num_simulations,
+                search_batch=params.search_batch,
             )
             if len(examples) > 1:
                 queue.put(examples)
@@ -290,19 +318,54 @@ def submain(params):
         shared_model.eval()
 
     shared_model.share_memory()
+    model_lock = mp.Lock()
+    model_version = mp.Value("i", 0)
     exp_queue = mp.Queue(maxsize=params.queue_size)
     processes = []
 
     p_trainer = mp.Process(
         target=trainer,
-        args=(0, shared_model, exp_queue, train_device, test_device, params),
+        args=(
+            0,
+            shared_model,
+            model_lock,
+            model_version,
+            exp_queue,
+            train_device,
+            test_device,
+            params,
+        ),
     )
     p_trainer.start()
 
-    for i in range(1, params.num_processes):
+    num_explorers = params.num_processes - 1
+    if params.inference_server:
+        # one more process owns the model and answers every explorer
+        requests = mp.Queue()
+        replies = {i: mp.Queue() for i in range(1, num_explorers + 1)}
+        p = mp.Process(
+            target=inference_server,
+            args=(
+                num_explorers + 1,
+                shared_model,
+                model_lock,
+                model_version,
+                requests,
+                replies,
+                test_device,
+                params,
+            ),
+        )
+        p.start()
+        processes.append(p)
+
+    for i in range(1, num_explorers + 1):
+        net = shared_model
+        if params.inference_server:
+            net = RemoteNet(i, requests, replies[i], mname=shared_model.__mname__)
         p = mp.Process(
             target=explorer,
-            args=(i, shared_model, exp_queue, test_device, params),
+            args=(i, net, exp_queue, test_device, params),
         )
         p.start()
         processes.append(p)
@@ -333,8 +396,42 @@ def main():
     parser.add_argument("--queue-size", default=64, type=int, help="queue size")
     parser.add_argument("--memory-size", default=64, type=int, help="memory size")
     parser.add_argument("--batch-size", default=8, type=int, help="batch size")
+    parser.add_argument(
+        "--search-batch",
+        default=8,
+        type=int,
+        help="leaves evaluated together by the net during a search",
+    )
     parser.add_argument("--epochs", default=1, type=int, help="epochs")
+    parser.add_argument(
+        "--prioritized",
+        action="store_true",
+        help="sample the replay buffer by value error",
+    )
+    parser.add_argument(
+        "--priority-beta",
+        default=0.4,
+        type=float,
+        help="importance sampling correction for --prioritized, 1 removes its bias",
+    )
     parser.add_argument("--weights-path", default="", help="weights")
+    parser.add_argument(
+        "--inference-server",
+        action="store_true",
+        help="run the net in one extra process that batches explorer requests",
+    )
+    parser.add_argument(
+        "--server-batch",
+        default=64,
+        type=int,
+        help="most phases the inference server evaluates at once",
+    )
+    parser.add_argument(
+        "--server-wait-ms",
+        default=2.0,
+        type=float,
+        help="how long the inference server waits to fill a batch",
+    )
     params = parser.parse_args()
     assert params.num_processes >= 2
     if params.num_threads == 0:
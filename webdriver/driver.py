@@ -112,6 +112,10 @@ class WebPlayerStrategy(BaseStrategy):
         self.ready = False
         self.reco_bot = make_reco_bot(reco_klassname)
 
+    def close(self):
+        if hasattr(self.reco_bot, "close"):
+            self.reco_bot.close()
+
     @staticmethod
     async def comms_twoway(self, websocket, obj):
         enrich_with_usernames(obj)
@@ -396,6 +400,10 @@ class Context:
 
     def end_game(self):
         assert self.game is not None
+        # strats are kept for a reset game, their pools start again if needed
+        for s in self.strats:
+            if hasattr(s, "close"):
+                s.close()
         del self.game
         self.game = None
         # self.strats.clear()